@@ -92,14 +92,17 @@ EXAMPLES = """
     local_action: cloudtrail state=disabled name=main region=us-east-1
 """
 
-HAS_BOTO = False
-try:
-    import boto
-    import boto.cloudtrail
-    from boto.regioninfo import RegionInfo
-    HAS_BOTO = True
-except ImportError:
-    HAS_BOTO = False
+
+def import_boto(module):
+    # boto takes a noticeable share of the module's run time to import, so
+    # it is only loaded once the arguments have been validated
+    global boto, RegionInfo
+    try:
+        import boto
+        import boto.cloudtrail
+        from boto.regioninfo import RegionInfo
+    except ImportError:
+        module.fail_json(msg='boto is required.')
 
 class CloudTrailManager:
     """Handles cloudtrail configuration"""
@@ -162,8 +165,7 @@ def main():
 
     module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True, required_together=required_together)
 
-    if not HAS_BOTO:
-      module.fail_json(msg='boto is required.')
+    import_boto(module)
 
     ec2_url, access_key, secret_key, region = get_ec2_creds(module)
     aws_connect_params = dict(aws_access_key_id=access_key,
@@ -114,24 +114,27 @@ table_status:
     sample: ACTIVE
 '''
 
-try:
-    import boto
-    import boto.dynamodb2
-    from boto.dynamodb2.table import Table
-    from boto.dynamodb2.fields import HashKey, RangeKey
-    from boto.dynamodb2.types import STRING, NUMBER, BINARY
-    from boto.exception import BotoServerError, NoAuthHandlerFound, JSONResponseError
-    HAS_BOTO = True
+DYNAMO_TYPE_MAP = {}
 
-except ImportError:
-    HAS_BOTO = False
 
+def import_boto(module):
+    """Import boto on demand, keeping it off the argument validation path."""
+    global boto, Table, HashKey, RangeKey, BotoServerError, NoAuthHandlerFound, JSONResponseError
+    try:
+        import boto
+        import boto.dynamodb2
+        from boto.dynamodb2.table import Table
+        from boto.dynamodb2.fields import HashKey, RangeKey
+        from boto.dynamodb2.types import STRING, NUMBER, BINARY
+        from boto.exception import BotoServerError, NoAuthHandlerFound, JSONResponseError
+    except ImportError:
+        module.fail_json(msg='boto required for this module')
 
-DYNAMO_TYPE_MAP = {
-    'STRING': STRING,
-    'NUMBER': NUMBER,
-    'BINARY': BINARY
-}
+    DYNAMO_TYPE_MAP.update({
+        'STRING': STRING,
+        'NUMBER': NUMBER,
+        'BINARY': BINARY
+    })
 
 
 def create_or_update_dynamo_table(connection, module):
@@ -258,8 +261,7 @@ def main():
         argument_spec=argument_spec,
         supports_check_mode=True)
 
-    if not HAS_BOTO:
-        module.fail_json(msg='boto required for this module')
+    import_boto(module)
 
     region, ec2_url, aws_connect_params = get_aws_connection_info(module)
     if not region:
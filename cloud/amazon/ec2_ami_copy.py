@@ -84,16 +84,16 @@ EXAMPLES = '''
 import sys
 import time
 
-try:
-    import boto
-    import boto.ec2
-    from boto.vpc import VPCConnection
-    HAS_BOTO = True
-except ImportError:
-    HAS_BOTO = False
-    
-if not HAS_BOTO:
-    module.fail_json(msg='boto required for this module')
+
+def import_boto(module):
+    global boto, VPCConnection
+    try:
+        import boto
+        import boto.ec2
+        from boto.vpc import VPCConnection
+    except ImportError:
+        module.fail_json(msg='boto required for this module')
+
 
 def copy_image(module, ec2):
     """
@@ -182,6 +182,7 @@ def main():
         tags=dict(type='dict')))
 
     module = AnsibleModule(argument_spec=argument_spec)
+    import_boto(module)
 
     try:
         ec2 = ec2_connect(module)
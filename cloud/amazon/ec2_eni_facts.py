@@ -44,12 +44,13 @@ EXAMPLES = '''
 
 import xml.etree.ElementTree as ET
 
-try:
-    import boto.ec2
-    from boto.exception import BotoServerError
-    HAS_BOTO = True
-except ImportError:
-    HAS_BOTO = False
+def import_boto(module):
+    global boto, BotoServerError
+    try:
+        import boto.ec2
+        from boto.exception import BotoServerError
+    except ImportError:
+        module.fail_json(msg='boto required for this module')
 
 
 def get_error_message(xml_string):
@@ -111,8 +112,7 @@ def main():
     
     module = AnsibleModule(argument_spec=argument_spec)
 
-    if not HAS_BOTO:
-        module.fail_json(msg='boto required for this module')
+    import_boto(module)
     
     region, ec2_url, aws_connect_params = get_aws_connection_info(module)
     
@@ -52,15 +52,15 @@ EXAMPLES = '''
 
 import sys  # noqa
 
-try:
-    import boto.ec2
-    import boto.vpc
-    from boto.exception import EC2ResponseError
-    HAS_BOTO = True
-except ImportError:
-    HAS_BOTO = False
-    if __name__ != '__main__':
-        raise
+
+def import_boto(module):
+    global boto, EC2ResponseError
+    try:
+        import boto.ec2
+        import boto.vpc
+        from boto.exception import EC2ResponseError
+    except ImportError:
+        module.fail_json(msg='boto is required for this module')
 
 
 class AnsibleIGWException(Exception):
@@ -126,8 +126,7 @@ def main():
         supports_check_mode=True,
     )
 
-    if not HAS_BOTO:
-        module.fail_json(msg='boto is required for this module')
+    import_boto(module)
 
     region, ec2_url, aws_connect_params = get_aws_connection_info(module)
 
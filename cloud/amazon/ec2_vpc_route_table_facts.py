@@ -60,12 +60,13 @@ EXAMPLES = '''
 
 '''
 
-try:
-    import boto.vpc
-    from boto.exception import BotoServerError
-    HAS_BOTO = True
-except ImportError:
-    HAS_BOTO = False
+def import_boto(module):
+    global boto, BotoServerError
+    try:
+        import boto.vpc
+        from boto.exception import BotoServerError
+    except ImportError:
+        module.fail_json(msg='boto required for this module')
 
 def get_route_table_info(route_table):
 
@@ -108,8 +109,7 @@ def main():
 
     module = AnsibleModule(argument_spec=argument_spec)
 
-    if not HAS_BOTO:
-        module.fail_json(msg='boto required for this module')
+    import_boto(module)
 
     region, ec2_url, aws_connect_params = get_aws_connection_info(module)
 
@@ -80,15 +80,35 @@ tasks:
 
 from base64 import b64decode
 from os.path import expanduser
-from Crypto.Cipher import PKCS1_v1_5
-from Crypto.PublicKey import RSA
 import datetime
 
-try:
-    import boto.ec2
-    HAS_BOTO = True
-except ImportError:
-    HAS_BOTO = False
+def import_boto(module):
+    # boto is only loaded once the arguments have been validated
+    global boto
+    try:
+        import boto.ec2
+    except ImportError:
+        module.fail_json(msg='Boto required for this module.')
+
+
+def decrypt_password(module, key_file, key_passphrase, decoded):
+    # pycrypto is only loaded once there is password data to decrypt,
+    # polling an instance whose password is not ready yet skips it
+    try:
+        from Crypto.Cipher import PKCS1_v1_5
+        from Crypto.PublicKey import RSA
+    except ImportError:
+        module.fail_json(msg='pycrypto required for this module.')
+
+    f = open(key_file, 'r')
+    key = RSA.importKey(f.read(), key_passphrase)
+    cipher = PKCS1_v1_5.new(key)
+    sentinel = 'password decryption failed!!!'
+
+    try:
+        return cipher.decrypt(decoded, sentinel)
+    except ValueError as e:
+        return None
 
 def main():
     argument_spec = ec2_argument_spec()
@@ -102,8 +122,7 @@ def main():
     )
     module = AnsibleModule(argument_spec=argument_spec)
 
-    if not HAS_BOTO:
-        module.fail_json(msg='Boto required for this module.')
+    import_boto(module)
 
     instance_id = module.params.get('instance_id')
     key_file = expanduser(module.params.get('key_file'))
@@ -131,15 +150,11 @@ def main():
     if wait and datetime.datetime.now() >= end:
         module.fail_json(msg = "wait for password timeout after %d seconds" % wait_timeout)
 
-    f = open(key_file, 'r')
-    key = RSA.importKey(f.read(), key_passphrase)
-    cipher = PKCS1_v1_5.new(key)
-    sentinel = 'password decryption failed!!!'
+    # no password data yet, nothing to decrypt
+    if not decoded:
+        module.exit_json(win_password='', changed=False)
 
-    try:
-        decrypted = cipher.decrypt(decoded, sentinel)
-    except ValueError as e:
-        decrypted = None
+    decrypted = decrypt_password(module, key_file, key_passphrase, decoded)
 
     if decrypted == None:
         module.exit_json(win_password='', changed=False)
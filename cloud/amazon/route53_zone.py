@@ -52,15 +52,17 @@ author: "Christopher Troup (@minichate)"
 
 import time
 
-try:
-    import boto
-    import boto.ec2
-    from boto import route53
-    from boto.route53 import Route53Connection
-    from boto.route53.zone import Zone
-    HAS_BOTO = True
-except ImportError:
-    HAS_BOTO = False
+
+def import_boto(module):
+    global boto, route53, Route53Connection, Zone
+    try:
+        import boto
+        import boto.ec2
+        from boto import route53
+        from boto.route53 import Route53Connection
+        from boto.route53.zone import Zone
+    except ImportError:
+        module.fail_json(msg='boto required for this module')
 
 
 def main():
@@ -74,8 +76,7 @@ def main():
         )
     )
 
-    if not HAS_BOTO:
-        module.fail_json(msg='boto required for this module')
+    import_boto(module)
 
     zone_in = module.params.get('zone').lower()
     state = module.params.get('state').lower()
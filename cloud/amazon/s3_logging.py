@@ -68,13 +68,14 @@ EXAMPLES = '''
     
 '''
 
-try:
-    import boto.ec2
-    from boto.s3.connection import OrdinaryCallingFormat, Location
-    from boto.exception import BotoServerError, S3CreateError, S3ResponseError
-    HAS_BOTO = True
-except ImportError:
-    HAS_BOTO = False
+def import_boto(module):
+    global boto, OrdinaryCallingFormat, Location, BotoServerError, S3CreateError, S3ResponseError
+    try:
+        import boto.ec2
+        from boto.s3.connection import OrdinaryCallingFormat, Location
+        from boto.exception import BotoServerError, S3CreateError, S3ResponseError
+    except ImportError:
+        module.fail_json(msg='boto required for this module')
 
 
 def compare_bucket_logging(bucket, target_bucket, target_prefix):
@@ -149,8 +150,7 @@ def main():
     
     module = AnsibleModule(argument_spec=argument_spec)
 
-    if not HAS_BOTO:
-        module.fail_json(msg='boto required for this module')
+    import_boto(module)
     
     region, ec2_url, aws_connect_params = get_aws_connection_info(module)
 
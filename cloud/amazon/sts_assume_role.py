@@ -85,12 +85,13 @@ ec2_tag:
 import sys
 import time
 
-try:
-    import boto.sts
-    from boto.exception import BotoServerError
-    HAS_BOTO = True
-except ImportError:
-    HAS_BOTO = False
+def import_boto(module):
+    global boto, BotoServerError
+    try:
+        import boto.sts
+        from boto.exception import BotoServerError
+    except ImportError:
+        module.fail_json(msg='boto required for this module')
     
 
 def assume_role_policy(connection, module):
@@ -128,8 +129,7 @@ def main():
            
     module = AnsibleModule(argument_spec=argument_spec)
 
-    if not HAS_BOTO:
-        module.fail_json(msg='boto required for this module')
+    import_boto(module)
     
     region, ec2_url, aws_connect_params = get_aws_connection_info(module)
     
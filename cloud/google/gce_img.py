@@ -110,16 +110,20 @@ EXAMPLES = '''
 
 import sys
 
-try:
-  from libcloud.compute.types import Provider
-  from libcloud.compute.providers import get_driver
-  from libcloud.common.google import GoogleBaseError
-  from libcloud.common.google import ResourceExistsError
-  from libcloud.common.google import ResourceNotFoundError
-  _ = Provider.GCE
-  has_libcloud = True
-except ImportError:
-  has_libcloud = False
+
+def import_libcloud(module):
+  """Load libcloud only once the task arguments have been validated."""
+  global Provider, get_driver, GoogleBaseError, ResourceExistsError, \
+      ResourceNotFoundError
+  try:
+    from libcloud.compute.types import Provider
+    from libcloud.compute.providers import get_driver
+    from libcloud.common.google import GoogleBaseError
+    from libcloud.common.google import ResourceExistsError
+    from libcloud.common.google import ResourceNotFoundError
+    _ = Provider.GCE
+  except ImportError:
+    module.fail_json(msg='libcloud with GCE support is required.')
 
 
 GCS_URI = 'https://storage.googleapis.com/'
@@ -183,8 +187,7 @@ def main():
       )
   )
 
-  if not has_libcloud:
-    module.fail_json(msg='libcloud with GCE support is required.')
+  import_libcloud(module)
 
   gce = gce_connect(module)
 
@@ -89,16 +89,19 @@ EXAMPLES = '''
 
 '''
 
-try:
-    from libcloud.compute.types import Provider
-    from libcloud.compute.providers import get_driver
-    from libcloud.common.google import GoogleBaseError, QuotaExceededError, \
+
+def import_libcloud(module):
+    global Provider, get_driver, GoogleBaseError, QuotaExceededError, \
         ResourceExistsError, ResourceNotFoundError, InvalidRequestError
+    try:
+        from libcloud.compute.types import Provider
+        from libcloud.compute.providers import get_driver
+        from libcloud.common.google import GoogleBaseError, QuotaExceededError, \
+            ResourceExistsError, ResourceNotFoundError, InvalidRequestError
 
-    _ = Provider.GCE
-    HAS_LIBCLOUD = True
-except ImportError:
-    HAS_LIBCLOUD = False
+        _ = Provider.GCE
+    except ImportError:
+        module.fail_json(msg='libcloud with GCE support is required.')
 
 
 def add_tags(gce, module, instance_name, tags):
@@ -193,9 +196,6 @@ def main():
         )
     )
 
-    if not HAS_LIBCLOUD:
-        module.fail_json(msg='libcloud with GCE support is required.')
-
     instance_name = module.params.get('instance_name')
     state = module.params.get('state')
     tags = module.params.get('tags')
@@ -208,6 +208,7 @@ def main():
     if not tags:
         module.fail_json(msg='Must specify "tags"', changed=False)
 
+    import_libcloud(module)
     gce = gce_connect(module)
 
     # add tags to instance.
@@ -90,12 +90,15 @@ VIRT_UNAVAILABLE=2
 
 import sys
 
-try:
-    import libvirt
-except ImportError:
-    HAS_VIRT = False
-else:
-    HAS_VIRT = True
+
+def import_libvirt(module):
+    global libvirt
+    try:
+        import libvirt
+    except ImportError:
+        module.fail_json(
+            msg='The `libvirt` module is not importable. Check the requirements.'
+        )
 
 ALL_COMMANDS = []
 VM_COMMANDS = ['create','status', 'start', 'stop', 'pause', 'unpause',
@@ -482,10 +485,11 @@ def main():
         xml = dict(),
     ))
 
-    if not HAS_VIRT:
-        module.fail_json(
-            msg='The `libvirt` module is not importable. Check the requirements.'
-        )
+    if not module.params['state'] and not module.params['command']:
+        module.fail_json(msg="expected state or command parameter to be specified")
+
+    # libvirt is only loaded once the arguments are known to be usable
+    import_libvirt(module)
 
     rc = VIRT_SUCCESS
     try:
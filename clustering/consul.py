@@ -36,6 +36,10 @@ description:
    result this does not attempt to determine changes and will always report a
    changed occurred. An api method is planned to supply this metadata so at that
    stage change management will be added.
+ - "The I(services) and I(checks) options declare the services and checks of
+   the agent in one task. The registered services and checks are read once and
+   only those that differ are registered again. To tell whether a check changed,
+   a digest of its definition is appended to the notes it is registered with."
  - "See http://consul.io for more details."
 requirements:
   - "python >= 2.6"
@@ -74,6 +78,13 @@ options:
     notes:
         description:
           - Notes to attach to check when registering it.
+          - The checks of I(services) and I(checks) are registered with a
+            digest of their definition appended to their notes, e.g.
+            C(disk usage (definition 3f2a9c01d4e7)), or C(definition 3f2a9c01d4e7)
+            when they have none. The agent does not return the script, interval
+            or ttl of a check, the digest is how a changed definition is
+            detected. Checks registered with this option alone keep their notes
+            as given.
         required: false
         default: None
     service_port:
@@ -128,6 +139,38 @@ options:
           - the token key indentifying an ACL rule set. May be required to register services.
         required: false
         default: None
+    services:
+        description:
+          - a list of services to register with the agent in one pass. Each item
+            is a dict taking the keys C(service_name), C(service_id),
+            C(service_port), C(tags), C(script), C(interval) and C(ttl) with the
+            same meaning as the module options of the same name. Only services
+            missing from the agent or differing from the item are registered.
+            The notes of their checks carry a digest of the check definition,
+            see I(notes).
+        required: false
+        default: None
+        version_added: "2.1"
+    checks:
+        description:
+          - a list of node level checks to register with the agent in one pass.
+            Each item is a dict taking the keys C(check_name), C(check_id),
+            C(script), C(interval), C(ttl) and C(notes) with the same meaning as
+            the module options of the same name. Only checks missing from the
+            agent or whose definition changed are registered. Their notes carry
+            a digest of the check definition, see I(notes).
+        required: false
+        default: None
+        version_added: "2.1"
+    purge:
+        description:
+          - when I(services) or I(checks) is given, deregister the services,
+            respectively the node level checks, of the agent that are not part
+            of the list. The C(consul) service and the C(serfHealth) check are
+            never deregistered.
+        required: false
+        default: false
+        version_added: "2.1"
 """
 
 EXAMPLES = '''
@@ -163,9 +206,28 @@ EXAMPLES = '''
       script: "/opt/disk_usage.py"
       interval: 5m
 
+  - name: declare all services and checks of the agent, removing any others
+    consul:
+      services:
+        - service_name: nginx
+          service_port: 80
+          script: "curl http://localhost"
+          interval: 60s
+        - service_name: redis
+          service_port: 6379
+          tags:
+            - prod
+      checks:
+        - check_name: Disk usage
+          check_id: disk_usage
+          script: "/opt/disk_usage.py"
+          interval: 5m
+      purge: yes
+
 '''
 
 import sys
+import hashlib
 
 try:
     import json
@@ -183,7 +245,9 @@ def register_with_consul(module):
 
     state = module.params.get('state')
 
-    if state == 'present':
+    if module.params.get('services') is not None or module.params.get('checks') is not None:
+        sync(module)
+    elif state == 'present':
         add(module)
     else:
         remove(module)
@@ -287,6 +351,149 @@ def remove_service(module, service_id):
     module.exit_json(changed=False, id=service_id)
 
 
+def sync(module):
+    ''' registers the given lists of services and checks, reading what the
+    agent already has once and registering only what differs '''
+    services = parse_services(module)
+    checks = parse_checks(module)
+    purge = module.params.get('purge')
+
+    consul_api = get_consul_api(module)
+    existing_services = dict((s['ID'], ConsulService(loaded=s))
+                             for s in consul_api.agent.services().values())
+    existing_checks = consul_api.agent.checks()
+
+    result = dict(registered_services=[], deregistered_services=[],
+                  registered_checks=[], deregistered_checks=[])
+
+    wanted_checks = []
+    if services is not None:
+        for service in services:
+            existing = existing_services.get(service.id)
+            if not existing or service_differs(existing, service):
+                service.register(consul_api, include_checks=False)
+                result['registered_services'].append(service.id)
+            service_check_id = 'service:%s' % service.id
+            if service.has_checks():
+                check = service.checks[0]
+                check.check_id = service_check_id
+                check.service_id = service.id
+                # registering a service again may drop the checks attached to it
+                if service.id in result['registered_services']:
+                    existing_checks.pop(service_check_id, None)
+                wanted_checks.append(check)
+            elif existing and service_check_id in existing_checks:
+                consul_api.agent.check.deregister(service_check_id)
+                result['deregistered_checks'].append(service_check_id)
+
+        if purge:
+            wanted = set(s.id for s in services)
+            for service_id in sorted(existing_services):
+                if service_id not in wanted and service_id != 'consul':
+                    consul_api.agent.service.deregister(service_id)
+                    result['deregistered_services'].append(service_id)
+
+    if checks is not None:
+        wanted_checks.extend(checks)
+
+        if purge:
+            wanted = set(c.check_id for c in checks)
+            for check_id in sorted(existing_checks):
+                if (check_id not in wanted and check_id != 'serfHealth'
+                        and not check_id.startswith('service:')):
+                    consul_api.agent.check.deregister(check_id)
+                    result['deregistered_checks'].append(check_id)
+
+    for check in wanted_checks:
+        notes = check.notes_with_digest()
+        existing = existing_checks.get(check.check_id)
+        if (not existing or existing.get('Name') != check.name
+                or existing.get('Notes') != notes
+                or (existing.get('ServiceID') or None) != check.service_id):
+            check.register(consul_api, notes=notes)
+            result['registered_checks'].append(check.check_id)
+
+    changed = any(len(ids) > 0 for ids in result.values())
+    module.exit_json(changed=changed, **result)
+
+
+def service_differs(existing, service):
+    return (existing.name != service.name
+            or existing.port != service.port
+            or (existing.tags or []) != (service.tags or []))
+
+
+def validate_check_item(module, item, owner):
+    ''' the checks of services and checks items are registered in one
+    pass, so reject the definitions the agent would refuse up front '''
+    if item.get('script') and item.get('ttl'):
+        module.fail_json(
+            msg='check are either script or ttl driven, supplying both does'\
+            ' not make sense (%s)' % owner)
+    if item.get('script') and not item.get('interval'):
+        module.fail_json(msg='scripts require an interval (%s)' % owner)
+    if item.get('interval') and not item.get('script'):
+        module.fail_json(msg='an interval is only used with a script (%s)' % owner)
+
+
+def parse_services(module):
+    items = module.params.get('services')
+    if items is None:
+        return None
+
+    services = []
+    for item in items:
+        if not isinstance(item, dict):
+            module.fail_json(msg='services must be a list of dicts, got %s' % item)
+        name = item.get('service_name') or item.get('name')
+        port = item.get('service_port') or item.get('port')
+        if not name or not port:
+            module.fail_json(msg='a service_name and service_port are required'\
+                                 ' for every item of services, got %s' % item)
+        validate_check_item(module, item, 'service %s' % name)
+        try:
+            port = int(port)
+        except ValueError:
+            module.fail_json(msg='service_port of service %s must be an integer' % name)
+
+        service = ConsulService(item.get('service_id') or item.get('id'),
+                                name, port, item.get('tags'))
+        if item.get('script') or item.get('ttl'):
+            service.add_check(ConsulCheck(
+                None, "Service '%s' check" % name,
+                script=item.get('script'),
+                interval=item.get('interval'),
+                ttl=item.get('ttl')))
+        services.append(service)
+    return services
+
+
+def parse_checks(module):
+    items = module.params.get('checks')
+    if items is None:
+        return None
+
+    checks = []
+    for item in items:
+        if not isinstance(item, dict):
+            module.fail_json(msg='checks must be a list of dicts, got %s' % item)
+        name = item.get('check_name') or item.get('name')
+        if not name:
+            module.fail_json(msg='a check_name is required for every item of'\
+                                 ' checks, got %s' % item)
+        if not (item.get('script') or item.get('ttl')):
+            module.fail_json(msg='check %s needs either a script and interval'\
+                                 ' or a ttl' % name)
+        validate_check_item(module, item, 'check %s' % name)
+
+        checks.append(ConsulCheck(item.get('check_id') or item.get('id'), name,
+                                  script=item.get('script'),
+                                  interval=item.get('interval'),
+                                  ttl=item.get('ttl'),
+                                  notes=item.get('notes')))
+    return checks
+
+
 def get_consul_api(module, token=None):
     return consul.Consul(host=module.params.get('host'),
                          port=module.params.get('port'),
@@ -354,8 +561,8 @@ class ConsulService():
             self.port = loaded['Port']
             self.tags = loaded['Tags']
 
-    def register(self, consul_api):
-        if len(self.checks) > 0:
+    def register(self, consul_api, include_checks=True):
+        if include_checks and len(self.checks) > 0:
             check = self.checks[0]
             consul_api.agent.service.register(
                 self.name,
@@ -405,7 +612,8 @@ class ConsulService():
 class ConsulCheck():
 
     def __init__(self, check_id, name, node=None, host='localhost',
-                    script=None, interval=None, ttl=None, notes=None):
+                    script=None, interval=None, ttl=None, notes=None,
+                    service_id=None):
         self.check_id = self.name = name
         if check_id:
             self.check_id = check_id
@@ -415,6 +623,7 @@ class ConsulCheck():
         self.notes = notes
         self.node = node
         self.host = host
+        self.service_id = service_id
 
         
 
@@ -426,18 +635,31 @@ class ConsulCheck():
                         (name, duration, ', '.join(duration_units)))
         return duration
 
-    def register(self, consul_api):
-        consul_api.agent.check.register(self.name, check_id=self.check_id,
-                                        script=self.script,
-                                        interval=self.interval,
-                                        ttl=self.ttl, notes=self.notes)
+    def register(self, consul_api, notes=None):
+        kwargs = dict(check_id=self.check_id, script=self.script,
+                      interval=self.interval, ttl=self.ttl,
+                      notes=notes or self.notes)
+        if self.service_id:
+            kwargs['service_id'] = self.service_id
+        consul_api.agent.check.register(self.name, **kwargs)
+
+    def notes_with_digest(self):
+        ''' the agent does not return the script, interval or ttl of a
+        check, so a digest of them travels in the notes instead '''
+        definition = json.dumps([self.name, self.script, self.interval,
+                                 self.ttl, self.service_id])
+        digest = hashlib.sha1(definition).hexdigest()[:12]
+        if self.notes:
+            return '%s (definition %s)' % (self.notes, digest)
+        return 'definition %s' % digest
 
     def __eq__(self, other):
         return (isinstance(other, self.__class__)
                 and self.check_id == other.check_id
                 and self.name == other.name
-                and self.script == script
-                and self.interval == interval)
+                and self.script == other.script
+                and self.interval == other.interval
+                and self.ttl == other.ttl)
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -485,8 +707,15 @@ def main():
             interval=dict(required=False, type='str'),
             ttl=dict(required=False, type='str'),
             tags=dict(required=False, type='list'),
-            token=dict(required=False)
+            token=dict(required=False),
+            services=dict(required=False, type='list'),
+            checks=dict(required=False, type='list'),
+            purge=dict(default=False, type='bool')
         ),
+        mutually_exclusive=[['services', 'service_name'],
+                            ['services', 'service_id'],
+                            ['checks', 'check_name'],
+                            ['checks', 'check_id']],
         supports_check_mode=False,
     )
     
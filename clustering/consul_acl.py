@@ -69,6 +69,17 @@ options:
           - the port on which the consul agent is running
         required: false
         default: 8500
+    tokens:
+        description:
+          - a list of tokens to manage in one pass. Each item is a dict taking
+            the keys C(name), C(token), C(token_type), C(rules) and C(state) with
+            the same meaning as the module options of the same name. Items
+            without a token are matched to existing tokens by name. The
+            existing tokens are fetched once and only tokens whose name, type or
+            rules differ are updated.
+        required: false
+        default: None
+        version_added: "2.1"
 """
 
 EXAMPLES = '''
@@ -89,6 +100,22 @@ EXAMPLES = '''
         host: 'consul1.mycluster.io'
         token: '172bd5c8-9fe9-11e4-b1b0-3c15c2c9fd5e'
         state: absent
+
+    - name: manage the tokens of several applications at once
+      consul_acl:
+        mgmt_token: 'some_management_acl'
+        host: 'consul1.mycluster.io'
+        tokens:
+          - name: 'Foo access'
+            rules:
+              - key: 'foo'
+                policy: read
+          - name: 'Bar access'
+            rules:
+              - key: 'bar'
+                policy: write
+          - name: 'Retired app'
+            state: absent
 '''
 
 import sys
@@ -112,7 +139,9 @@ def execute(module):
 
     state = module.params.get('state')
 
-    if state == 'present':
+    if module.params.get('tokens') is not None:
+        update_acls(module)
+    elif state == 'present':
         update_acl(module)
     else:
         remove_acl(module)
@@ -134,9 +163,7 @@ def update_acl(module):
         if token:
             existing_rules = load_rules_for_token(module, consul, token)
             supplied_rules = yml_to_rules(module, rules)
-            print existing_rules
-            print supplied_rules
-            changed = not existing_rules == supplied_rules
+            changed = existing_rules != supplied_rules
             if changed:
                 y = supplied_rules.to_hcl()
                 token = consul.acl.update(
@@ -169,6 +196,85 @@ def update_acl(module):
                      type=token_type)
 
 
+def update_acls(module):
+    ''' converge a list of tokens against a single listing of the existing
+    ones, creating, updating or destroying only what differs '''
+    mgmt = module.params.get('mgmt_token')
+    consul = get_consul_api(module, mgmt)
+
+    items = []
+    for item in module.params.get('tokens'):
+        if not isinstance(item, dict):
+            module.fail_json(msg="tokens must be a list of dicts, got %s" % item)
+        if not (item.get('token') or item.get('name')):
+            module.fail_json(msg="every item of tokens requires a name or a token")
+        state = item.get('state', 'present')
+        if state not in ('present', 'absent'):
+            module.fail_json(msg="state of token %s must be present or absent" % (
+                             item.get('token') or item.get('name')))
+        token_type = item.get('token_type', item.get('type', 'client'))
+        if token_type not in ('client', 'management'):
+            module.fail_json(msg="token_type of token %s must be client or management" % (
+                             item.get('token') or item.get('name')))
+        items.append(dict(token=item.get('token'), name=item.get('name'),
+                          token_type=token_type, state=state,
+                          rules=yml_to_rules(module, item.get('rules'))))
+
+    try:
+        existing = consul.acl.list()
+    except Exception, e:
+        module.fail_json(msg="Could not list acls, check your managment key %s" % e)
+
+    by_id = {}
+    by_name = {}
+    for acl in existing:
+        by_id[acl['ID']] = acl
+        by_name.setdefault(acl.get('Name'), acl)
+
+    created = []
+    updated = []
+    removed = []
+    tokens = []
+    for item in items:
+        if item['token']:
+            acl = by_id.get(item['token'])
+        else:
+            acl = by_name.get(item['name'])
+
+        try:
+            if item['state'] == 'absent':
+                if acl:
+                    consul.acl.destroy(acl['ID'])
+                    removed.append(acl['ID'])
+                continue
+
+            if not acl:
+                token = consul.acl.create(name=item['name'],
+                                          type=item['token_type'],
+                                          rules=item['rules'].to_hcl() or None,
+                                          acl_id=item['token'])
+                created.append(token)
+            else:
+                token = acl['ID']
+                name = item['name'] or acl.get('Name')
+                if (name != acl.get('Name') or item['token_type'] != acl.get('Type')
+                        or parse_rules(acl.get('Rules')) != item['rules']):
+                    consul.acl.update(token, name=name, type=item['token_type'],
+                                      rules=item['rules'].to_hcl())
+                    updated.append(token)
+            tokens.append(dict(token=token, name=item['name']))
+        except Exception, e:
+            module.fail_json(msg="Could not create/update acl %s: %s" % (
+                             item['token'] or item['name'], e),
+                             created=created, updated=updated, removed=removed)
+
+    module.exit_json(changed=len(created + updated + removed) > 0,
+                     tokens=tokens,
+                     created=created,
+                     updated=updated,
+                     removed=removed)
+
+
 def remove_acl(module):
     state = module.params.get('state')
     token = module.params.get('token')
@@ -184,14 +290,10 @@ def remove_acl(module):
 
 def load_rules_for_token(module, consul_api, token):
     try:
-        rules = Rules()
         info = consul_api.acl.info(token)
-        if info and info['Rules']:
-            rule_set = to_ascii(info['Rules'])
-            for rule in hcl.loads(rule_set).values():
-                for key, policy in rule.iteritems():
-                    rules.add_rule(Rule(key, policy['policy']))
-        return rules
+        if info:
+            return parse_rules(info['Rules'])
+        return Rules()
     except Exception, e:
         module.fail_json(
             msg="Could not load rule list from retrieved rule data %s, %s" % (
@@ -199,6 +301,20 @@ def load_rules_for_token(module, consul_api, token):
 
     return json_to_rules(module, loaded)
 
+# tokens frequently share the same rule text, parse each text only once
+parsed_rules = {}
+
+def parse_rules(rule_set):
+    rule_set = to_ascii(rule_set or '')
+    if rule_set not in parsed_rules:
+        rules = Rules()
+        if rule_set:
+            for rule in hcl.loads(rule_set).values():
+                for key, policy in rule.iteritems():
+                    rules.add_rule(Rule(key, policy['policy']))
+        parsed_rules[rule_set] = rules
+    return parsed_rules[rule_set]
+
 def to_ascii(unicode_string):
     if isinstance(unicode_string, unicode):
         return unicode_string.encode('ascii', 'ignore')
@@ -242,19 +358,15 @@ class Rules:
 
         return to_ascii(rules)
 
-    def __eq__(self, other):
-        if not (other or isinstance(other, self.__class__)
-                or len(other.rules) == len(self.rules)):
-            return False
+    def rule_set(self):
+        return frozenset(self.rules.itervalues())
 
-        for name, other_rule in other.rules.iteritems():
-            if not name in self.rules:
-                return False
-            rule = self.rules[name]
+    def __eq__(self, other):
+        return (isinstance(other, self.__class__)
+                and self.rule_set() == other.rule_set())
 
-            if not (rule and rule == other_rule):
-                return False
-        return True
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     def __str__(self):
         return self.to_hcl()
@@ -269,6 +381,9 @@ class Rule:
         return (isinstance(other, self.__class__)
                 and self.key == other.key
                 and self.policy == other.policy)
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
     def __hash__(self):
         return hash(self.key) ^ hash(self.policy)
 
@@ -301,7 +416,8 @@ def main():
         state=dict(default='present', choices=['present', 'absent']),
         token=dict(required=False),
         token_type=dict(
-            required=False, choices=['client', 'management'], default='client')
+            required=False, choices=['client', 'management'], default='client'),
+        tokens=dict(required=False, type='list')
     )
     module = AnsibleModule(argument_spec, supports_check_mode=False)
 
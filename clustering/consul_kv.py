@@ -99,6 +99,41 @@ options:
           - the port on which the consul agent is running
         required: false
         default: 8500
+    tree:
+        description:
+          - a dict of key/value pairs to sync under the prefix given by I(key).
+            Nested dicts extend the key with their own keys separated by '/',
+            values that are not strings are stored as JSON. The existing keys
+            under the prefix are read with a single recursive request and the
+            changes are written through the transaction endpoint (Consul 0.7
+            or later) in batches of 64 operations.
+        required: false
+        default: None
+        version_added: "2.1"
+    purge:
+        description:
+          - in I(tree) mode, delete the keys under the prefix that are not part
+            of the tree.
+        required: false
+        default: false
+        version_added: "2.1"
+    wait_for:
+        description:
+          - instead of changing the key, wait until it is present, absent,
+            holds I(value), or is locked or unlocked by a session. The agent is
+            asked with blocking queries, so each request returns only once the
+            key was modified or the query wait expired. I(state) is ignored.
+        required: false
+        choices: ['present', 'absent', 'value', 'locked', 'unlocked']
+        default: None
+        version_added: "2.1"
+    wait_timeout:
+        description:
+          - how long to wait in seconds for the I(wait_for) condition before
+            failing.
+        required: false
+        default: 300
+        version_added: "2.1"
 """
 
 
@@ -118,9 +153,29 @@ EXAMPLES = '''
     consul_kv:
       key: ansible/groups/dc1/somenode
       value: 'top_secret'
+
+  - name: sync the configuration of an application, removing stale keys
+    consul_kv:
+      key: config/myapp
+      tree:
+        log_level: info
+        workers: 8
+        database:
+          host: db.example.com
+          port: 5432
+      purge: yes
+
+  - name: wait up to ten minutes for the deployment gate to open
+    consul_kv:
+      key: deploy/myapp/gate
+      wait_for: value
+      value: open
+      wait_timeout: 600
 '''
 
 import sys
+import time
+import base64
 
 try:
     import json
@@ -136,10 +191,19 @@ except ImportError, e:
 
 from requests.exceptions import ConnectionError
 
+# the transaction endpoint rejects more operations than this in one request
+TXN_MAX_OPS = 64
+# consul caps the wait of a blocking query at ten minutes
+MAX_QUERY_WAIT = 600
+
 def execute(module):
 
     state = module.params.get('state')
 
+    if module.params.get('wait_for'):
+        wait_for_key(module)
+    if module.params.get('tree') is not None:
+        sync_tree(module)
     if state == 'acquire' or state == 'release':
         lock(module, state)
     if state == 'present':
@@ -220,6 +284,139 @@ def remove_value(module):
                      data=existing)
 
 
+def wait_for_key(module):
+    ''' wait for a condition on a key using blocking queries, issuing a new
+    request only when the key changed or the query wait expired '''
+    consul_api = get_consul_api(module)
+
+    key = module.params.get('key')
+    condition = module.params.get('wait_for')
+    value = module.params.get('value')
+    if condition == 'value' and value is None:
+        module.fail_json(msg='wait_for=value requires a value to wait for')
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+
+    deadline = time.time() + module.params.get('wait_timeout')
+    index = None
+    queries = 0
+    while True:
+        remaining = deadline - time.time()
+        if index is not None and remaining <= 0:
+            module.fail_json(msg='timed out waiting for %s to be %s' % (key, condition),
+                             index=index, data=data, queries=queries)
+
+        wait = None
+        if index is not None:
+            wait = '%ds' % max(1, min(int(remaining), MAX_QUERY_WAIT))
+        new_index, data = consul_api.kv.get(key, index=index, wait=wait)
+        queries += 1
+
+        if key_matches(condition, data, value):
+            module.exit_json(changed=False,
+                             index=new_index,
+                             key=key,
+                             data=data,
+                             queries=queries)
+
+        # an index going backwards means the raft state was reset, start over
+        if index is not None and int(new_index) < int(index):
+            new_index = 0
+        index = new_index
+
+
+def key_matches(condition, data, value):
+    if condition == 'present':
+        return data is not None
+    if condition == 'absent':
+        return data is None
+    if data is None:
+        return False
+    if condition == 'value':
+        return data.get('Value') == value
+    if condition == 'locked':
+        return bool(data.get('Session'))
+    return not data.get('Session')
+
+
+def sync_tree(module):
+    ''' sync the keys under a prefix with the supplied tree, reading the
+    prefix once and writing the differences in transactions '''
+    consul_api = get_consul_api(module)
+
+    prefix = module.params.get('key').rstrip('/')
+    tree = module.params.get('tree')
+    if not isinstance(tree, dict):
+        module.fail_json(msg='tree must be a dict of keys and values')
+
+    wanted = {}
+    flatten_tree(prefix, tree, wanted)
+
+    index, existing = consul_api.kv.get(prefix + '/', recurse=True)
+    current = {}
+    for entry in existing or []:
+        current[entry['Key']] = entry
+
+    flags = module.params.get('flags')
+    ops = []
+    updated = []
+    for key in sorted(wanted):
+        value = wanted[key]
+        entry = current.get(key)
+        if (entry is None or entry.get('Value') != value
+                or (flags is not None and entry.get('Flags') != int(flags))):
+            op = dict(Verb='set', Key=key, Value=base64.b64encode(value))
+            if flags is not None:
+                op['Flags'] = int(flags)
+            ops.append(dict(KV=op))
+            updated.append(key)
+
+    removed = []
+    if module.params.get('purge'):
+        for key in sorted(current):
+            if key not in wanted and key != prefix + '/':
+                ops.append(dict(KV=dict(Verb='delete', Key=key)))
+                removed.append(key)
+
+    if ops and not module.check_mode:
+        for start in range(0, len(ops), TXN_MAX_OPS):
+            run_txn(module, consul_api, ops[start:start + TXN_MAX_OPS])
+
+    module.exit_json(changed=len(ops) > 0,
+                     index=index,
+                     key=prefix,
+                     updated=updated,
+                     removed=removed)
+
+
+def flatten_tree(prefix, tree, flat):
+    for name, value in tree.iteritems():
+        key = '%s/%s' % (prefix, str(name).strip('/'))
+        if isinstance(value, dict):
+            flatten_tree(key, value, flat)
+            continue
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        elif not isinstance(value, str):
+            value = json.dumps(value)
+        flat[key.lstrip('/')] = value
+
+
+def run_txn(module, consul_api, ops):
+    params = {}
+    if consul_api.token:
+        params['token'] = consul_api.token
+    response = consul_api.http.put(lambda response: response, '/v1/txn',
+                                   params=params, data=json.dumps(ops))
+    if response.code != 200:
+        try:
+            errors = json.loads(response.body).get('Errors')
+        except (ValueError, AttributeError):
+            errors = response.body
+        module.fail_json(msg='consul transaction failed with status %s' % response.code,
+                         errors=errors)
+
+
 def get_consul_api(module, token=None):
     return consul.Consul(host=module.params.get('host'),
                          port=module.params.get('port'),
@@ -242,7 +439,12 @@ def main():
         retrieve=dict(required=False, default=True),
         state=dict(default='present', choices=['present', 'absent']),
         token=dict(required=False, default='anonymous'),
-        value=dict(required=False)
+        value=dict(required=False),
+        tree=dict(required=False, type='dict'),
+        purge=dict(required=False, default=False, type='bool'),
+        wait_for=dict(required=False,
+                      choices=['present', 'absent', 'value', 'locked', 'unlocked']),
+        wait_timeout=dict(required=False, default=300, type='int')
     )
 
     module = AnsibleModule(argument_spec, supports_check_mode=False)
@@ -40,9 +40,12 @@ options:
             required to remove the session. Info for a single session, all the
             sessions for a node or all available sessions can be retrieved by
             specifying info, node or list for the state; for node or info, the
-            node name or session id is required as parameter.
+            node name or session id is required as parameter. The state purge
+            destroys all the sessions matching I(node), I(name_regex) and
+            I(created_before) at once; at least one of them is required, so
+            purge never destroys every session of the datacenter.
         required: false
-        choices: ['present', 'absent', 'info', 'node', 'list']
+        choices: ['present', 'absent', 'info', 'node', 'list', 'purge']
         default: present
     name:
         description:
@@ -88,6 +91,28 @@ options:
           - the port on which the consul agent is running
         required: false
         default: 8500
+    name_regex:
+        description:
+          - with state purge, only destroy the sessions whose name matches this
+            regular expression.
+        required: false
+        default: None
+        version_added: "2.1"
+    created_before:
+        description:
+          - with state purge, only destroy the sessions created before this
+            Consul index. Sessions carry no timestamp, their CreateIndex tells
+            their age instead; the index returned by a previous purge or list
+            can be used here.
+        required: false
+        default: None
+        version_added: "2.1"
+    concurrency:
+        description:
+          - with state purge, the number of sessions destroyed in parallel.
+        required: false
+        default: 8
+        version_added: "2.1"
 """
 
 EXAMPLES = '''
@@ -111,9 +136,18 @@ EXAMPLES = '''
 
 - name: retrieve active sessions
   consul_session: state=list
+
+- name: destroy the deploy lock sessions left behind by a decommissioned node
+  consul_session:
+    state: purge
+    node: web-07
+    name_regex: "^deploy-"
 '''
 
 import sys
+import re
+import Queue
+import threading
 
 try:
     import consul
@@ -128,6 +162,8 @@ def execute(module):
 
     if state in ['info', 'list', 'node']:
         lookup_sessions(module)
+    elif state == 'purge':
+        purge_sessions(module)
     elif state == 'present':
         update_session(module)
     else:
@@ -221,6 +257,81 @@ def remove_session(module):
         module.fail_json(msg="Could not remove session with id '%s' %s" % (
                          session_id, e))
 
+def purge_sessions(module):
+    ''' list the sessions once and destroy the ones matching the filters
+    using a bounded number of worker threads '''
+    datacenter = module.params.get('datacenter')
+    node = module.params.get('node')
+    created_before = module.params.get('created_before')
+    concurrency = module.params.get('concurrency')
+
+    if not (node or module.params.get('name_regex') or created_before):
+        module.fail_json(msg="purge requires at least one of node, name_regex "
+                             "or created_before")
+    name_regex = None
+    if module.params.get('name_regex'):
+        try:
+            name_regex = re.compile(module.params.get('name_regex'))
+        except re.error, e:
+            module.fail_json(msg="Invalid name_regex: %s" % e)
+    if concurrency < 1:
+        module.fail_json(msg="concurrency must be at least 1")
+
+    consul = get_consul_api(module)
+    if node:
+        index, sessions = consul.session.node(node, dc=datacenter)
+    else:
+        index, sessions = consul.session.list(dc=datacenter)
+
+    matched = []
+    for session in sessions or []:
+        if name_regex and not name_regex.search(session.get('Name') or ''):
+            continue
+        if created_before and session.get('CreateIndex', 0) >= created_before:
+            continue
+        matched.append(session['ID'])
+
+    pending = Queue.Queue()
+    for session_id in matched:
+        pending.put(session_id)
+
+    destroyed = []
+    failures = {}
+
+    def destroy():
+        # each worker gets its own client, the http session is not shared
+        api = get_consul_api(module)
+        while True:
+            try:
+                session_id = pending.get_nowait()
+            except Queue.Empty:
+                return
+            try:
+                api.session.destroy(session_id, dc=datacenter)
+                destroyed.append(session_id)
+            except Exception, e:
+                failures[session_id] = str(e)
+
+    threads = []
+    for i in range(min(concurrency, len(matched))):
+        thread = threading.Thread(target=destroy)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    result = dict(changed=len(destroyed) > 0,
+                  index=index,
+                  listed=len(sessions or []),
+                  matched=len(matched),
+                  destroyed=sorted(destroyed),
+                  failures=failures)
+    if failures:
+        module.fail_json(msg="Could not destroy %d of %d sessions" % (
+                         len(failures), len(matched)), **result)
+    module.exit_json(**result)
+
+
 def validate_duration(name, duration):
     if duration:
         duration_units = ['ns', 'us', 'ms', 's', 'm', 'h']
@@ -248,7 +359,10 @@ def main():
         name=dict(required=False),
         node=dict(required=False),
         state=dict(default='present',
-                   choices=['present', 'absent', 'info', 'node', 'list'])
+                   choices=['present', 'absent', 'info', 'node', 'list', 'purge']),
+        name_regex=dict(required=False),
+        created_before=dict(required=False, type='int'),
+        concurrency=dict(required=False, default=8, type='int')
     )
 
     module = AnsibleModule(argument_spec, supports_check_mode=False)
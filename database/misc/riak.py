@@ -57,14 +57,21 @@ options:
     aliases: []
   wait_for_handoffs:
     description:
-      - Number of seconds to wait for handoffs to complete.
+      - Number of seconds to wait for handoffs to complete. The node stats are
+        polled meanwhile and C(riak-admin transfers) only runs once the ring
+        ownership stopped changing. If the stats cannot be read it runs on
+        every poll.
     required: false
     default: null
     aliases: []
     type: 'int'
   wait_for_ring:
     description:
-      - Number of seconds to wait for all nodes to agree on the ring.
+      - Number of seconds to wait for all nodes to agree on the ring. The node
+        stats are polled meanwhile and C(riak-admin ringready) only runs once
+        all ring members are connected and the ring ownership stopped changing.
+        If the stats cannot be read or lack the ring members it runs on every
+        poll.
     required: false
     default: null
     aliases: []
@@ -78,8 +85,8 @@ options:
     choices: ['kv']
   validate_certs:
     description:
-      - If C(no), SSL certificates will not be validated. This should only be used
-        on personally controlled sites using self-signed certificates.
+      - Deprecated and ignored, the stats are read over plain HTTP from
+        I(http_conn). Will be removed in a future release.
     required: false
     default: 'yes'
     choices: ['yes', 'no']
@@ -100,12 +107,103 @@ EXAMPLES = '''
 import time
 import socket
 import sys
+import httplib
 try:
     import json
 except ImportError:
     import simplejson as json
 
 
+# polls start this many seconds apart and back off up to MAX_POLL_INTERVAL
+MIN_POLL_INTERVAL = 1
+MAX_POLL_INTERVAL = 10
+
+
+class RiakStats(object):
+    ''' fetches /stats over a single HTTP connection kept open between polls '''
+
+    def __init__(self, http_conn, timeout=5):
+        self.http_conn = http_conn
+        self.timeout = timeout
+        self.connection = None
+
+    def fetch_raw(self):
+        try:
+            if self.connection is None:
+                self.connection = httplib.HTTPConnection(self.http_conn, timeout=self.timeout)
+            self.connection.request('GET', '/stats', headers={'Accept': 'application/json'})
+            response = self.connection.getresponse()
+            body = response.read()
+        except (socket.error, httplib.HTTPException):
+            # the node may still be starting, reconnect on the next poll
+            self.close()
+            return None
+        if response.status != 200:
+            return None
+        return body
+
+    def fetch(self):
+        raw = self.fetch_raw()
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def handoff_signal(stats):
+    return stats.get('ring_ownership')
+
+
+def ring_signal(stats):
+    nodename = stats.get('nodename')
+    members = stats.get('ring_members')
+    if nodename is None or members is None:
+        return None
+    connected = set(stats.get('connected_nodes') or [])
+    connected.add(nodename)
+    if not all(member in connected for member in members):
+        return False
+    return (stats.get('ring_ownership'), tuple(sorted(members)))
+
+
+def wait_for(riak_stats, timeout, signal, check):
+    ''' poll the stats with a growing interval and run the expensive check
+    only when the signal derived from the stats held still since the last
+    poll (or on the first poll). A signal of False means not ready yet, no
+    signal at all (None) falls back to running the check on every poll '''
+    deadline = time.time() + timeout
+    delay = MIN_POLL_INTERVAL
+    previous = last = object()
+    checks = 0
+    while True:
+        stats = riak_stats.fetch()
+        current = None
+        if stats is not None:
+            current = signal(stats)
+        if current is None or (current is not False and (previous is last or current == previous)):
+            checks += 1
+            if check():
+                return checks
+        previous = current
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, MAX_POLL_INTERVAL)
+
+
+def transfers_check(module, riak_admin_bin):
+    rc, out, err = module.run_command('%s transfers' % riak_admin_bin)
+    return 'No transfers active' in out
+
+
 def ring_check(module, riak_admin_bin):
     cmd = '%s ringready' % riak_admin_bin
     rc, out, err = module.run_command(cmd)
@@ -138,22 +236,23 @@ def main():
     wait_for_handoffs = module.params.get('wait_for_handoffs')
     wait_for_ring = module.params.get('wait_for_ring')
     wait_for_service = module.params.get('wait_for_service')
-    validate_certs =  module.params.get('validate_certs')
 
 
     #make sure riak commands are on the path
     riak_bin = module.get_bin_path('riak')
     riak_admin_bin = module.get_bin_path('riak-admin')
 
+    riak_stats = RiakStats(http_conn)
     timeout = time.time() + 120
+    delay = MIN_POLL_INTERVAL
     while True:
         if time.time() > timeout:
             module.fail_json(msg='Timeout, could not fetch Riak stats.')
-        (response, info) = fetch_url(module, 'http://%s/stats' % (http_conn), force=True, timeout=5)
-        if info['status'] == 200:
-            stats_raw = response.read()
+        stats_raw = riak_stats.fetch_raw()
+        if stats_raw is not None:
             break
-        time.sleep(5)
+        time.sleep(delay)
+        delay = min(delay * 2, MAX_POLL_INTERVAL)
 
     # here we attempt to load those stats,
     try:
@@ -221,16 +320,10 @@ def main():
 
 # this could take a while, recommend to run in async mode
     if wait_for_handoffs:
-        timeout = time.time() + wait_for_handoffs
-        while True:
-            cmd = '%s transfers' % riak_admin_bin
-            rc, out, err = module.run_command(cmd)
-            if 'No transfers active' in out:
-                result['handoffs'] = 'No transfers active.'
-                break
-            time.sleep(10)
-            if time.time() > timeout:
-                module.fail_json(msg='Timeout waiting for handoffs.')
+        if wait_for(riak_stats, wait_for_handoffs, handoff_signal,
+                    lambda: transfers_check(module, riak_admin_bin)) is None:
+            module.fail_json(msg='Timeout waiting for handoffs.')
+        result['handoffs'] = 'No transfers active.'
 
     if wait_for_service:
         cmd = [riak_admin_bin, 'wait_for_service', 'riak_%s' % wait_for_service, node_name ]
@@ -238,20 +331,18 @@ def main():
         result['service'] = out
 
     if wait_for_ring:
-        timeout = time.time() + wait_for_ring
-        while True:
-            if ring_check(module, riak_admin_bin):
-                break
-            time.sleep(10)
-        if time.time() > timeout:
+        if wait_for(riak_stats, wait_for_ring, ring_signal,
+                    lambda: ring_check(module, riak_admin_bin)) is None:
             module.fail_json(msg='Timeout waiting for nodes to agree on ring.')
+        result['ring_ready'] = True
+    else:
+        result['ring_ready'] = ring_check(module, riak_admin_bin)
 
-    result['ring_ready'] = ring_check(module, riak_admin_bin)
+    riak_stats.close()
 
     module.exit_json(**result)
 
 # import module snippets
 from ansible.module_utils.basic import *
-from ansible.module_utils.urls import *
 if __name__ == '__main__':
     main()
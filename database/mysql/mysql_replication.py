@@ -34,7 +34,7 @@ author: "Balazs Pocze (@banyek)"
 options:
     mode:
         description:
-            - module operating mode. Could be getslave (SHOW SLAVE STATUS), getmaster (SHOW MASTER STATUS), changemaster (CHANGE MASTER TO), startslave (START SLAVE), stopslave (STOP SLAVE)
+            - module operating mode. Could be getslave (SHOW SLAVE STATUS), getmaster (SHOW MASTER STATUS), changemaster (CHANGE MASTER TO), startslave (START SLAVE), stopslave (STOP SLAVE), waitforsync (poll SHOW SLAVE STATUS until the slave caught up)
         required: False
         choices:
             - getslave
@@ -42,6 +42,7 @@ options:
             - changemaster
             - stopslave
             - startslave
+            - waitforsync
         default: getslave
     login_user:
         description:
@@ -116,6 +117,47 @@ options:
         required: false
         default: null
         version_added: "2.0"
+    max_lag:
+        description:
+            - with mode waitforsync, the Seconds_Behind_Master under which the slave is considered in sync.
+              When master_log_file and master_log_pos are given, the slave must also have executed the master binlog up to that position.
+        required: false
+        default: 0
+        version_added: "2.1"
+    gtid_set:
+        description:
+            - with mode waitforsync, a GTID set the slave must have executed, e.g. the Executed_Gtid_Set returned by getmaster on the master. Needs MySQL 5.6.5 or later.
+        required: false
+        default: null
+        version_added: "2.1"
+    wait_timeout:
+        description:
+            - with mode waitforsync, how many seconds to wait for the slave to catch up before failing.
+        required: false
+        default: 300
+        version_added: "2.1"
+    poll_interval:
+        description:
+            - with mode waitforsync, the initial number of seconds between two polls. The interval doubles after each poll, up to 30 seconds.
+        required: false
+        default: 1
+        version_added: "2.1"
+    replicas:
+        description:
+            - run the mode against each of these slaves instead of login_host, in parallel. Items are either C(host), C(host:port) or dicts
+              with the keys host, port, login_user and login_password, which default to the module parameters; dicts may also override
+              any of the master_* parameters. In changemaster mode each slave is stopped, changed and started again.
+              Supported with the getslave, stopslave, startslave and changemaster modes; typically run from the controller with
+              delegate_to localhost.
+        required: false
+        default: null
+        version_added: "2.1"
+    parallelism:
+        description:
+            - with replicas, how many slaves are handled at the same time.
+        required: false
+        default: 5
+        version_added: "2.1"
 '''
 
 EXAMPLES = '''
@@ -130,10 +172,26 @@ EXAMPLES = '''
 
 # Check slave status using port 3308
 - mysql_replication: mode=getslave login_host=ansible.example.com login_port=3308
+
+# Wait up to 10 minutes for the slave to be at most 5 seconds behind its master
+- mysql_replication: mode=waitforsync max_lag=5 wait_timeout=600
+
+# After a failover, point all slaves to the new master, ten at a time
+- mysql_replication:
+    mode: changemaster
+    master_host: db2.example.com
+    master_auto_position: yes
+    replicas: "{{ groups['dbslaves'] }}"
+    parallelism: 10
+  delegate_to: localhost
+  run_once: true
 '''
 
 import ConfigParser
 import os
+import time
+import Queue
+import threading
 import warnings
 
 try:
@@ -143,6 +201,9 @@ except ImportError:
 else:
     mysqldb_found = True
 
+# seconds, waitforsync never sleeps longer than this between two polls
+MAX_POLL_INTERVAL = 30
+
 
 def get_master_status(cursor):
     cursor.execute("SHOW MASTER STATUS")
@@ -156,6 +217,61 @@ def get_slave_status(cursor):
     return slavestatus
 
 
+def gtid_executed(cursor, gtid_set):
+    cursor.execute("SELECT GTID_SUBSET(%(gtid_set)s, @@GLOBAL.gtid_executed) AS executed", {'gtid_set': gtid_set})
+    return bool(cursor.fetchone()['executed'])
+
+
+def slave_in_sync(cursor, slavestatus, max_lag, master_log_file, master_log_pos, gtid_set):
+    lag = slavestatus['Seconds_Behind_Master']
+    if lag is None or lag > max_lag:
+        return False
+    if master_log_file and master_log_pos is not None:
+        executed = (slavestatus['Relay_Master_Log_File'], slavestatus['Exec_Master_Log_Pos'])
+        if executed < (master_log_file, master_log_pos):
+            return False
+    if gtid_set and not gtid_executed(cursor, gtid_set):
+        return False
+    return True
+
+
+def wait_for_sync(module, cursor, max_lag, master_log_file, master_log_pos, gtid_set):
+    """ Poll SHOW SLAVE STATUS over the open connection until the slave
+    caught up, backing off between polls """
+    start = time.time()
+    deadline = start + module.params["wait_timeout"]
+    interval = module.params["poll_interval"]
+    lag_history = []
+
+    while True:
+        slavestatus = get_slave_status(cursor)
+        if slavestatus is None:
+            module.fail_json(msg="Server is not configured as mysql slave")
+        elapsed = time.time() - start
+        lag_history.append(dict(elapsed=round(elapsed, 2), seconds_behind_master=slavestatus['Seconds_Behind_Master']))
+
+        try:
+            in_sync = slave_in_sync(cursor, slavestatus, max_lag, master_log_file, master_log_pos, gtid_set)
+        except MySQLdb.Error, e:
+            # GTID_SUBSET() only exists from MySQL 5.6.5 on
+            module.fail_json(msg="Could not compare gtid_set with the executed GTIDs, this needs MySQL 5.6.5 or later "
+                                 "with GTIDs enabled: %s" % e)
+        if in_sync:
+            module.exit_json(changed=False, synced=True, polls=len(lag_history), elapsed=round(elapsed, 2),
+                             lag_history=lag_history, **slavestatus)
+
+        if slavestatus['Slave_SQL_Running'] != 'Yes' and slavestatus['Last_SQL_Errno']:
+            module.fail_json(msg="Slave SQL thread stopped with error %s: %s" % (slavestatus['Last_SQL_Errno'], slavestatus['Last_SQL_Error']),
+                             synced=False, polls=len(lag_history), lag_history=lag_history)
+
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            module.fail_json(msg="Slave did not catch up within %s seconds" % module.params["wait_timeout"],
+                             synced=False, polls=len(lag_history), lag_history=lag_history)
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+
 def stop_slave(cursor):
     try:
         cursor.execute("STOP SLAVE")
@@ -180,6 +296,172 @@ def changemaster(cursor, chm, chm_params):
     cursor.execute(query, chm_params)
 
 
+def changemaster_params(params):
+    """ Build the CHANGE MASTER TO assignments and their values from the
+    master_* parameters """
+    chm=[]
+    chm_params = {}
+    if params["master_host"]:
+        chm.append("MASTER_HOST=%(master_host)s")
+        chm_params['master_host'] = params["master_host"]
+    if params["master_user"]:
+        chm.append("MASTER_USER=%(master_user)s")
+        chm_params['master_user'] = params["master_user"]
+    if params["master_password"]:
+        chm.append("MASTER_PASSWORD=%(master_password)s")
+        chm_params['master_password'] = params["master_password"]
+    if params["master_port"] is not None:
+        chm.append("MASTER_PORT=%(master_port)s")
+        chm_params['master_port'] = params["master_port"]
+    if params["master_connect_retry"] is not None:
+        chm.append("MASTER_CONNECT_RETRY=%(master_connect_retry)s")
+        chm_params['master_connect_retry'] = params["master_connect_retry"]
+    if params["master_log_file"]:
+        chm.append("MASTER_LOG_FILE=%(master_log_file)s")
+        chm_params['master_log_file'] = params["master_log_file"]
+    if params["master_log_pos"] is not None:
+        chm.append("MASTER_LOG_POS=%(master_log_pos)s")
+        chm_params['master_log_pos'] = params["master_log_pos"]
+    if params["relay_log_file"]:
+        chm.append("RELAY_LOG_FILE=%(relay_log_file)s")
+        chm_params['relay_log_file'] = params["relay_log_file"]
+    if params["relay_log_pos"] is not None:
+        chm.append("RELAY_LOG_POS=%(relay_log_pos)s")
+        chm_params['relay_log_pos'] = params["relay_log_pos"]
+    if params["master_ssl"]:
+        chm.append("MASTER_SSL=1")
+    if params["master_ssl_ca"]:
+        chm.append("MASTER_SSL_CA=%(master_ssl_ca)s")
+        chm_params['master_ssl_ca'] = params["master_ssl_ca"]
+    if params["master_ssl_capath"]:
+        chm.append("MASTER_SSL_CAPATH=%(master_ssl_capath)s")
+        chm_params['master_ssl_capath'] = params["master_ssl_capath"]
+    if params["master_ssl_cert"]:
+        chm.append("MASTER_SSL_CERT=%(master_ssl_cert)s")
+        chm_params['master_ssl_cert'] = params["master_ssl_cert"]
+    if params["master_ssl_key"]:
+        chm.append("MASTER_SSL_KEY=%(master_ssl_key)s")
+        chm_params['master_ssl_key'] = params["master_ssl_key"]
+    if params["master_ssl_cipher"]:
+        chm.append("MASTER_SSL_CIPHER=%(master_ssl_cipher)s")
+        chm_params['master_ssl_cipher'] = params["master_ssl_cipher"]
+    if params["master_auto_position"]:
+        chm.append("MASTER_AUTO_POSITION = 1")
+    return chm, chm_params
+
+
+def replica_params(module, index, replica, login_user, login_password):
+    """ Normalize an item of replicas into the parameters used to reach and
+    change that slave """
+    if not isinstance(replica, dict):
+        replica = dict(host=replica)
+        if ':' in replica['host']:
+            replica['host'], replica['port'] = replica['host'].rsplit(':', 1)
+    # items may carry passwords, never echo them
+    module.no_log_values.update([replica[key] for key in ('login_password', 'master_password') if replica.get(key)])
+    if not replica.get('host'):
+        module.fail_json(msg="item %d of replicas requires a host" % index)
+
+    params = dict(module.params, port=module.params["login_port"],
+                  login_user=login_user, login_password=login_password)
+    params.update(replica)
+    try:
+        params['port'] = int(params['port'])
+    except ValueError:
+        module.fail_json(msg="invalid port for replica %s" % params['host'])
+    return params
+
+
+def run_on_replica(mode, params):
+    """ Connect to one slave and run the mode on it, timing each step """
+    result = dict(host=params['host'], port=params['port'], changed=False, failed=False)
+    timings = {}
+    start = time.time()
+    db_connection = None
+    try:
+        try:
+            db_connection = MySQLdb.connect(host=params['host'], port=params['port'],
+                                            user=params['login_user'], passwd=params['login_password'])
+            cursor = db_connection.cursor(cursorclass=MySQLdb.cursors.DictCursor)
+            timings['connect'] = time.time() - start
+
+            if mode == "getslave":
+                step = time.time()
+                result['status'] = get_slave_status(cursor)
+                timings['getslave'] = time.time() - step
+                if result['status'] is None:
+                    result.update(failed=True, msg="Server is not configured as mysql slave")
+            if mode in ("stopslave", "changemaster"):
+                step = time.time()
+                result['stopped'] = stop_slave(cursor)
+                timings['stopslave'] = time.time() - step
+            if mode == "changemaster":
+                step = time.time()
+                chm, chm_params = changemaster_params(params)
+                changemaster(cursor, chm, chm_params)
+                timings['changemaster'] = time.time() - step
+            if mode in ("startslave", "changemaster"):
+                step = time.time()
+                result['started'] = start_slave(cursor)
+                timings['startslave'] = time.time() - step
+                if mode == "changemaster" and not result['started']:
+                    result.update(failed=True, msg="Slave could not be started after CHANGE MASTER TO")
+        except Exception, e:
+            result.update(failed=True, msg=str(e))
+    finally:
+        if db_connection is not None:
+            db_connection.close()
+
+    result['changed'] = ('changemaster' in timings or result.get('stopped', False)
+                         or result.get('started', False))
+
+    timings['total'] = time.time() - start
+    result['timings'] = dict((step, round(seconds, 3)) for step, seconds in timings.items())
+    return result
+
+
+def fan_out(module, mode, login_user, login_password):
+    """ Run the mode against every item of replicas with a bounded number of
+    worker threads, one connection per slave """
+    if mode not in ("getslave", "stopslave", "startslave", "changemaster"):
+        module.fail_json(msg="replicas is not supported with mode %s" % mode)
+    parallelism = module.params["parallelism"]
+    if parallelism < 1:
+        module.fail_json(msg="parallelism must be at least 1")
+
+    pending = Queue.Queue()
+    for (index, replica) in enumerate(module.params["replicas"]):
+        pending.put(replica_params(module, index, replica, login_user, login_password))
+
+    results = []
+
+    def worker():
+        while True:
+            try:
+                params = pending.get_nowait()
+            except Queue.Empty:
+                return
+            results.append(run_on_replica(mode, params))
+
+    start = time.time()
+    threads = []
+    for i in range(min(parallelism, pending.qsize())):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    results.sort(key=lambda result: (result['host'], result['port']))
+    failed = [result['host'] for result in results if result['failed']]
+    changed = any(result['changed'] for result in results)
+    elapsed = round(time.time() - start, 3)
+    if failed:
+        module.fail_json(msg="%s failed on %d of %d replicas: %s" % (mode, len(failed), len(results), ', '.join(failed)),
+                         changed=changed, replicas=results, elapsed=elapsed)
+    module.exit_json(changed=changed, replicas=results, elapsed=elapsed)
+
+
 def strip_quotes(s):
     """ Remove surrounding single or double quotes
 
@@ -247,7 +529,7 @@ def main():
             login_host=dict(default="localhost"),
             login_port=dict(default=3306, type='int'),
             login_unix_socket=dict(default=None),
-            mode=dict(default="getslave", choices=["getmaster", "getslave", "changemaster", "stopslave", "startslave"]),
+            mode=dict(default="getslave", choices=["getmaster", "getslave", "changemaster", "stopslave", "startslave", "waitforsync"]),
             master_auto_position=dict(default=False, type='bool'),
             master_host=dict(default=None),
             master_user=dict(default=None),
@@ -264,6 +546,12 @@ def main():
             master_ssl_cert=dict(default=None),
             master_ssl_key=dict(default=None),
             master_ssl_cipher=dict(default=None),
+            max_lag=dict(default=0, type='int'),
+            gtid_set=dict(default=None),
+            wait_timeout=dict(default=300, type='int'),
+            poll_interval=dict(default=1, type='int'),
+            replicas=dict(default=None, type='list'),
+            parallelism=dict(default=5, type='int'),
         )
     )
     user = module.params["login_user"]
@@ -309,6 +597,9 @@ def main():
     elif login_password is None or login_user is None:
         module.fail_json(msg="when supplying login arguments, both login_user and login_password must be provided")
 
+    if module.params["replicas"] is not None:
+        fan_out(module, mode, login_user, login_password)
+
     try:
         if module.params["login_unix_socket"]:
             db_connection = MySQLdb.connect(host=module.params["login_host"], unix_socket=module.params["login_unix_socket"], user=login_user, passwd=login_password)
@@ -338,54 +629,7 @@ def main():
             module.fail_json(msg="Server is not configured as mysql slave")
 
     elif mode in "changemaster":
-        chm=[]
-        chm_params = {}
-        if master_host:
-            chm.append("MASTER_HOST=%(master_host)s")
-            chm_params['master_host'] = master_host
-        if master_user:
-            chm.append("MASTER_USER=%(master_user)s")
-            chm_params['master_user'] = master_user
-        if master_password:
-            chm.append("MASTER_PASSWORD=%(master_password)s")
-            chm_params['master_password'] = master_password
-        if master_port is not None:
-            chm.append("MASTER_PORT=%(master_port)s")
-            chm_params['master_port'] = master_port
-        if master_connect_retry is not None:
-            chm.append("MASTER_CONNECT_RETRY=%(master_connect_retry)s")
-            chm_params['master_connect_retry'] = master_connect_retry
-        if master_log_file:
-            chm.append("MASTER_LOG_FILE=%(master_log_file)s")
-            chm_params['master_log_file'] = master_log_file
-        if master_log_pos is not None:
-            chm.append("MASTER_LOG_POS=%(master_log_pos)s")
-            chm_params['master_log_pos'] = master_log_pos
-        if relay_log_file:
-            chm.append("RELAY_LOG_FILE=%(relay_log_file)s")
-            chm_params['relay_log_file'] = relay_log_file
-        if relay_log_pos is not None:
-            chm.append("RELAY_LOG_POS=%(relay_log_pos)s")
-            chm_params['relay_log_pos'] = relay_log_pos
-        if master_ssl:
-            chm.append("MASTER_SSL=1")
-        if master_ssl_ca:
-            chm.append("MASTER_SSL_CA=%(master_ssl_ca)s")
-            chm_params['master_ssl_ca'] = master_ssl_ca
-        if master_ssl_capath:
-            chm.append("MASTER_SSL_CAPATH=%(master_ssl_capath)s")
-            chm_params['master_ssl_capath'] = master_ssl_capath
-        if master_ssl_cert:
-            chm.append("MASTER_SSL_CERT=%(master_ssl_cert)s")
-            chm_params['master_ssl_cert'] = master_ssl_cert
-        if master_ssl_key:
-            chm.append("MASTER_SSL_KEY=%(master_ssl_key)s")
-            chm_params['master_ssl_key'] = master_ssl_key
-        if master_ssl_cipher:
-            chm.append("MASTER_SSL_CIPHER=%(master_ssl_cipher)s")
-            chm_params['master_ssl_cipher'] = master_ssl_cipher
-        if master_auto_position:
-            chm.append("MASTER_AUTO_POSITION = 1")
+        chm, chm_params = changemaster_params(module.params)
         changemaster(cursor, chm, chm_params)
         module.exit_json(changed=True)
     elif mode in "startslave":
@@ -400,6 +644,8 @@ def main():
             module.exit_json(msg="Slave stopped", changed=True)
         else:
             module.exit_json(msg="Slave already stopped", changed=False)
+    elif mode in "waitforsync":
+        wait_for_sync(module, cursor, module.params["max_lag"], master_log_file, master_log_pos, module.params["gtid_set"])
 
 # import module snippets
 from ansible.module_utils.basic import *
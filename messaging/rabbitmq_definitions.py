@@ -0,0 +1,336 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (c) 2016, Ansible Project
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+DOCUMENTATION = '''
+---
+module: rabbitmq_definitions
+author: "Ansible Core Team"
+version_added: "2.1"
+
+short_description: Converge many rabbitMQ exchanges, queues and bindings at once
+description:
+  - This module uses the rabbitMQ Rest API to create and delete a list of
+    exchanges, queues and bindings in one task.
+  - The definitions are fetched once from C(/api/definitions) and diffed
+    against the wanted objects. Only the missing objects are created and the
+    unwanted ones deleted, all over a single connection.
+  - Existing exchanges and queues whose attributes differ are reported
+    together and the module fails before making any change, like
+    M(rabbitmq_exchange) and M(rabbitmq_queue) do for a single object.
+requirements: [ python requests ]
+options:
+    login_user:
+        description:
+            - rabbitMQ user for connection
+        required: false
+        default: guest
+    login_password:
+        description:
+            - rabbitMQ password for connection
+        required: false
+        default: guest
+    login_host:
+        description:
+            - rabbitMQ host for connection
+        required: false
+        default: localhost
+    login_port:
+        description:
+            - rabbitMQ management api port
+        required: false
+        default: 15672
+    vhost:
+        description:
+            - rabbitMQ virtual host of the items that do not set C(vhost)
+        required: false
+        default: "/"
+    exchanges:
+        description:
+            - A list of exchanges. Each item takes C(name) and any of C(state)
+              (default C(present)), C(vhost), C(type) (default C(direct)),
+              C(durable) (default C(yes)), C(auto_delete), C(internal) and
+              C(arguments), like the options of M(rabbitmq_exchange).
+        required: false
+        default: []
+    queues:
+        description:
+            - A list of queues. Each item takes C(name) and any of C(state)
+              (default C(present)), C(vhost), C(durable) (default C(yes)),
+              C(auto_delete), C(message_ttl), C(auto_expires), C(max_length),
+              C(dead_letter_exchange), C(dead_letter_routing_key) and
+              C(arguments), like the options of M(rabbitmq_queue).
+        required: false
+        default: []
+    bindings:
+        description:
+            - A list of bindings. Each item takes C(source) (or C(src), C(name)),
+              C(destination) (or C(dst), C(dest)), C(destination_type) (or
+              C(type), C(dest_type)) and any of C(state) (default C(present)),
+              C(vhost), C(routing_key) (default C(#)) and C(arguments), like the
+              options of M(rabbitmq_binding).
+        required: false
+        default: []
+    import_definitions:
+        description:
+            - Create all missing objects with one C(POST /api/definitions) instead
+              of one request per object.
+            - Deletions still take one request per object, a definitions import
+              only adds objects.
+        required: false
+        choices: [ "yes", "no" ]
+        default: no
+'''
+
+EXAMPLES = '''
+# Declare a topology in one task
+- rabbitmq_definitions:
+    vhost: myVhost
+    import_definitions: yes
+    exchanges:
+      - name: events
+        type: topic
+    queues:
+      - name: orders
+        message_ttl: 60000
+      - name: obsolete
+        state: absent
+    bindings:
+      - source: events
+        destination: orders
+        destination_type: queue
+        routing_key: order.*
+'''
+
+import requests
+import urllib
+import json
+
+QUEUE_ARGUMENTS = {
+    'message_ttl': 'x-message-ttl',
+    'auto_expires': 'x-expires',
+    'max_length': 'x-max-length',
+    'dead_letter_exchange': 'x-dead-letter-exchange',
+    'dead_letter_routing_key': 'x-dead-letter-routing-key'
+}
+
+ALIASES = {
+    'exchanges': {'exchange_type': 'type'},
+    'queues': {},
+    'bindings': {
+        'src': 'source',
+        'name': 'source',
+        'dst': 'destination',
+        'dest': 'destination',
+        'type': 'destination_type',
+        'dest_type': 'destination_type'
+    }
+}
+
+DEFAULTS = {
+    'exchanges': dict(state='present', type='direct', durable=True, auto_delete=False, internal=False, arguments=None),
+    'queues': dict(state='present', durable=True, auto_delete=False, arguments=None,
+                   **dict((k, None) for k in QUEUE_ARGUMENTS)),
+    'bindings': dict(state='present', destination=None, destination_type=None, routing_key='#', arguments=None)
+}
+
+# attributes sent when creating an object
+FIELDS = {
+    'exchanges': ('name', 'vhost', 'type', 'durable', 'auto_delete', 'internal', 'arguments'),
+    'queues': ('name', 'vhost', 'durable', 'auto_delete', 'arguments'),
+    'bindings': ('source', 'vhost', 'destination', 'destination_type', 'routing_key', 'arguments')
+}
+
+# attributes that cannot be changed on an existing object
+IMMUTABLE = {
+    'exchanges': ('type', 'durable', 'auto_delete', 'internal'),
+    'queues': ('durable', 'auto_delete', 'arguments'),
+    'bindings': ()
+}
+
+def api_request(module, session, method, parts, data=None, expected=(200, 201, 204)):
+    url = "http://%s:%s/api/%s" % (
+        module.params['login_host'],
+        module.params['login_port'],
+        '/'.join([urllib.quote(part, '') for part in parts])
+    )
+    if data is not None:
+        data = json.dumps(data)
+    try:
+        r = session.request(method, url, data=data)
+    except requests.exceptions.RequestException, e:
+        module.fail_json(msg="Error connecting to RESTAPI: %s" % e)
+    if r.status_code not in expected:
+        module.fail_json(
+            msg = "Invalid response from RESTAPI for %s %s" % (method, url),
+            status = r.status_code,
+            details = r.text
+        )
+    return r
+
+def object_key(kind, obj):
+    """Identity of an object in the definitions."""
+    if kind == 'bindings':
+        return (obj['vhost'], obj['source'], obj['destination_type'], obj['destination'],
+                obj['routing_key'], json.dumps(obj['arguments'], sort_keys=True))
+    return (obj['vhost'], obj['name'])
+
+def wanted_objects(module, kind):
+    """Normalize the items of the exchanges, queues or bindings option."""
+    singular = kind[:-1]
+    objects = []
+    for (idx, item) in enumerate(module.params[kind]):
+        if not isinstance(item, dict):
+            module.fail_json(msg="Item %d of %s must be a dictionary" % (idx, kind))
+        item = dict(item)
+        for alias, key in ALIASES[kind].items():
+            if alias in item:
+                item[key] = item.pop(alias)
+        required = kind == 'bindings' and ['source', 'destination', 'destination_type'] or ['name']
+        missing = [key for key in required if not item.get(key)]
+        if missing:
+            module.fail_json(msg="Item %d of %s needs %s" % (idx, kind, ', '.join(missing)))
+        unknown = set(item) - set(DEFAULTS[kind]) - set(required + ['vhost'])
+        if unknown:
+            module.fail_json(msg="Unsupported keys for item %d of %s: %s" % (idx, kind, ', '.join(sorted(unknown))))
+
+        obj = dict(DEFAULTS[kind], vhost=module.params['vhost'])
+        obj.update(item)
+        if obj['state'] not in ('present', 'absent'):
+            module.fail_json(msg="state of item %d of %s must be present or absent" % (idx, kind))
+        if kind == 'bindings' and obj['destination_type'] not in ('queue', 'exchange'):
+            module.fail_json(msg="destination_type of item %d of bindings must be queue or exchange" % idx)
+        for key in ('durable', 'auto_delete', 'internal'):
+            if key in obj:
+                obj[key] = module.boolean(obj[key])
+        obj['arguments'] = dict(obj['arguments'] or {})
+
+        if kind == 'queues':
+            for k, v in QUEUE_ARGUMENTS.items():
+                value = obj.pop(k)
+                if value is not None:
+                    if k in ('message_ttl', 'auto_expires', 'max_length'):
+                        try:
+                            value = int(value)
+                        except ValueError:
+                            module.fail_json(msg="%s of %s %s must be an integer" % (k, singular, obj['name']))
+                    obj['arguments'][v] = value
+        objects.append(obj)
+    return objects
+
+def diff_definitions(module, definitions):
+    """Split the wanted objects of every kind into the ones to create and
+    the ones to delete, failing on existing objects that differ."""
+    create = {}
+    delete = {}
+    conflicts = []
+    for kind in ('exchanges', 'queues', 'bindings'):
+        current = dict((object_key(kind, o), o) for o in definitions.get(kind, []))
+        create[kind] = []
+        delete[kind] = []
+        for obj in wanted_objects(module, kind):
+            existing = current.get(object_key(kind, obj))
+            if obj['state'] == 'absent':
+                if existing is not None:
+                    delete[kind].append(obj)
+            elif existing is None:
+                create[kind].append(obj)
+            elif [existing[k] for k in IMMUTABLE[kind]] != [obj[k] for k in IMMUTABLE[kind]]:
+                conflicts.append("%s %s" % (kind[:-1], obj['name']))
+
+    if conflicts:
+        module.fail_json(
+            msg = "RabbitMQ RESTAPI doesn't support attribute changes for existing objects: %s" % ', '.join(conflicts)
+        )
+    return create, delete
+
+def object_parts(kind, obj):
+    if kind == 'bindings':
+        return ['bindings', obj['vhost'], 'e', obj['source'], obj['destination_type'][0], obj['destination']]
+    return [kind, obj['vhost'], obj['name']]
+
+def properties_key(module, session, binding):
+    """Key that identifies an existing binding in its URL."""
+    if not binding['arguments']:
+        return binding['routing_key'] or '~'
+    # the key of a binding with arguments contains a hash of them, ask for it
+    r = api_request(module, session, 'GET', object_parts('bindings', binding), expected=(200,))
+    for existing in r.json():
+        if existing['routing_key'] == binding['routing_key'] and existing['arguments'] == binding['arguments']:
+            return existing['properties_key']
+    module.fail_json(msg="Could not find binding %s -> %s" % (binding['source'], binding['destination']))
+
+def apply_definitions(module, session, create, delete):
+    new = dict((kind, [dict((k, o[k]) for k in FIELDS[kind]) for o in objects])
+               for (kind, objects) in create.items())
+    if module.params['import_definitions']:
+        if [kind for kind in new if new[kind]]:
+            api_request(module, session, 'POST', ['definitions'], new)
+    else:
+        # bindings need their exchange and queue to exist
+        for kind in ('exchanges', 'queues'):
+            for obj in new[kind]:
+                api_request(module, session, 'PUT', object_parts(kind, obj), obj)
+        for binding in new['bindings']:
+            api_request(module, session, 'POST', object_parts('bindings', binding),
+                        dict(routing_key=binding['routing_key'], arguments=binding['arguments']))
+
+    for binding in delete['bindings']:
+        api_request(module, session, 'DELETE', object_parts('bindings', binding) + [properties_key(module, session, binding)])
+    for kind in ('queues', 'exchanges'):
+        for obj in delete[kind]:
+            api_request(module, session, 'DELETE', object_parts(kind, obj))
+
+def main():
+    module = AnsibleModule(
+        argument_spec = dict(
+            login_user = dict(default='guest', type='str'),
+            login_password = dict(default='guest', type='str', no_log=True),
+            login_host = dict(default='localhost', type='str'),
+            login_port = dict(default='15672', type='str'),
+            vhost = dict(default='/', type='str'),
+            exchanges = dict(default=[], type='list'),
+            queues = dict(default=[], type='list'),
+            bindings = dict(default=[], type='list'),
+            import_definitions = dict(default=False, choices=BOOLEANS, type='bool')
+        ),
+        supports_check_mode = True
+    )
+
+    session = requests.Session()
+    session.auth = (module.params['login_user'], module.params['login_password'])
+    session.headers.update({ "content-type": "application/json"})
+
+    definitions = api_request(module, session, 'GET', ['definitions'], expected=(200,)).json()
+    create, delete = diff_definitions(module, definitions)
+
+    if not module.check_mode:
+        apply_definitions(module, session, create, delete)
+
+    report = lambda kind, o: dict((k, o[k]) for k in FIELDS[kind] if k not in ('arguments', 'durable', 'auto_delete', 'internal'))
+    module.exit_json(
+        changed = any([create[kind] or delete[kind] for kind in create]),
+        created = dict((kind, [report(kind, o) for o in objects]) for (kind, objects) in create.items()),
+        deleted = dict((kind, [report(kind, o) for o in objects]) for (kind, objects) in delete.items())
+    )
+
+# import module snippets
+from ansible.module_utils.basic import *
+main()
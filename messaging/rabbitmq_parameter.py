@@ -30,12 +30,14 @@ options:
   component:
     description:
       - Name of the component of which the parameter is being set
-    required: true
+      - Required unless I(parameters) is given.
+    required: false
     default: null
   name:
     description:
       - Name of the parameter being set
-    required: true
+      - Required unless I(parameters) is given.
+    required: false
     default: null
   value:
     description:
@@ -59,6 +61,17 @@ options:
     required: false
     default: present
     choices: [ 'present', 'absent']
+  parameters:
+    description:
+      - A list of parameters to converge in one run instead of I(component)
+        and I(name). Each item takes C(component), C(name) and any of C(value),
+        C(vhost) and C(state), which default to the module options of the same
+        name. C(value) may also be given as a dictionary or list.
+      - The parameters of every vhost involved are listed once, and only the
+        parameters whose value differs are set.
+    required: false
+    default: null
+    version_added: "2.1"
 '''
 
 EXAMPLES = """
@@ -67,8 +80,25 @@ EXAMPLES = """
                       name=local-username
                       value='"guest"'
                       state=present
+
+# Set several federation upstreams with one listing per vhost
+- rabbitmq_parameter:
+    parameters:
+      - component: federation-upstream
+        name: east
+        value:
+          uri: amqp://east.example.com
+      - component: federation-upstream
+        name: west
+        value:
+          uri: amqp://west.example.com
+      - component: federation-upstream
+        name: north
+        state: absent
 """
 
+import json
+
 class RabbitMqParameter(object):
     def __init__(self, module, component, name, value, vhost, node):
         self.module = module
@@ -89,15 +119,20 @@ class RabbitMqParameter(object):
             return out.splitlines()
         return list()
 
-    def get(self):
-        parameters = self._exec(['list_parameters', '-p', self.vhost], True)
-
-        for param_item in parameters:
+    def list(self):
+        parameters = dict()
+        for param_item in self._exec(['list_parameters', '-p', self.vhost], True):
             component, name, value = param_item.split('\t')
+            parameters[(component, name)] = value
+        return parameters
 
-            if component == self.component and name == self.name:
-                self._value = value
-                return True
+    def get(self, parameters=None):
+        if parameters is None:
+            parameters = self.list()
+
+        if (self.component, self.name) in parameters:
+            self._value = parameters[(self.component, self.name)]
+            return True
         return False
 
     def set(self):
@@ -107,22 +142,77 @@ class RabbitMqParameter(object):
         self._exec(['clear_parameter', '-p', self.vhost, self.component, self.name])
 
     def has_modifications(self):
-        return self.value != self._value
+        if self.value == self._value:
+            return False
+        # rabbitmqctl prints the value in its own JSON formatting
+        try:
+            return json.loads(self.value) != json.loads(self._value)
+        except (TypeError, ValueError):
+            return True
+
+def converge_parameter(rabbitmq_parameter, state, parameters=None):
+    changed = False
+    if rabbitmq_parameter.get(parameters):
+        if state == 'absent':
+            rabbitmq_parameter.delete()
+            changed = True
+        else:
+            if rabbitmq_parameter.has_modifications():
+                rabbitmq_parameter.set()
+                changed = True
+    elif state == 'present':
+        rabbitmq_parameter.set()
+        changed = True
+    return changed
+
+def converge_parameters(module):
+    """Converge the parameters option, listing every vhost only once."""
+    params = module.params
+    listings = dict()
+    report = []
+    for item in params['parameters']:
+        if not isinstance(item, dict) or not item.get('component') or not item.get('name'):
+            module.fail_json(msg="Every item of parameters must be a dictionary with a component and a name")
+        unknown = set(item) - set(['component', 'name', 'value', 'vhost', 'state'])
+        if unknown:
+            module.fail_json(msg="Unsupported keys for parameter %s: %s" % (item['name'], ', '.join(sorted(unknown))))
+        vhost = item.get('vhost', params['vhost'])
+        state = item.get('state', params['state'])
+        if state not in ('present', 'absent'):
+            module.fail_json(msg="state of parameter %s must be present or absent" % item['name'])
+        value = item.get('value', params['value'])
+        if value is not None and not isinstance(value, basestring):
+            value = json.dumps(value)
+
+        rabbitmq_parameter = RabbitMqParameter(module, item['component'], item['name'], value, vhost, params['node'])
+        if vhost not in listings:
+            listings[vhost] = rabbitmq_parameter.list()
+        changed = converge_parameter(rabbitmq_parameter, state, listings[vhost])
+        report.append(dict(component=item['component'], name=item['name'], vhost=vhost, state=state, changed=changed))
+
+    module.exit_json(changed=any([parameter['changed'] for parameter in report]), parameters=report)
 
 def main():
     arg_spec = dict(
-        component=dict(required=True),
-        name=dict(required=True),
+        component=dict(),
+        name=dict(),
         value=dict(default=None),
         vhost=dict(default='/'),
         state=dict(default='present', choices=['present', 'absent']),
-        node=dict(default='rabbit')
+        node=dict(default='rabbit'),
+        parameters=dict(type='list')
     )
     module = AnsibleModule(
         argument_spec=arg_spec,
+        required_one_of=[['name', 'parameters']],
+        required_together=[['component', 'name']],
+        mutually_exclusive=[['name', 'parameters']],
         supports_check_mode=True
     )
 
+    if module.params['parameters'] is not None:
+        converge_parameters(module)
+
     component = module.params['component']
     name = module.params['name']
     value = module.params['value']
@@ -132,18 +222,7 @@ def main():
 
     rabbitmq_parameter = RabbitMqParameter(module, component, name, value, vhost, node)
 
-    changed = False
-    if rabbitmq_parameter.get():
-        if state == 'absent':
-            rabbitmq_parameter.delete()
-            changed = True
-        else:
-            if rabbitmq_parameter.has_modifications():
-                rabbitmq_parameter.set()
-                changed = True
-    elif state == 'present':
-        rabbitmq_parameter.set()
-        changed = True
+    changed = converge_parameter(rabbitmq_parameter, state)
 
     module.exit_json(changed=changed, component=component, name=name, vhost=vhost, state=state)
 
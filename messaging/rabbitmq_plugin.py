@@ -52,11 +52,22 @@ options:
     required: false
     version_added: "1.3"
     default: null
+  offline:
+    description:
+      - Only change the enabled plugins file, without contacting the running
+        node. Useful when building images.
+    required: false
+    default: "no"
+    choices: [ "yes", "no" ]
+    version_added: "2.1"
 '''
 
 EXAMPLES = '''
 # Enables the rabbitmq_management plugin
 - rabbitmq_plugin: names=rabbitmq_management state=enabled
+
+# Enable plugins in an image that has no running broker
+- rabbitmq_plugin: names=rabbitmq_management,rabbitmq_shovel offline=yes
 '''
 
 class RabbitMqPlugins(object):
@@ -78,18 +89,24 @@ class RabbitMqPlugins(object):
     def get_all(self):
         return self._exec(['list', '-E', '-m'], True)
 
-    def enable(self, name):
-        self._exec(['enable', name])
+    def _offline(self):
+        if self.module.params['offline']:
+            return ['--offline']
+        return []
+
+    def enable(self, names):
+        self._exec(['enable'] + self._offline() + names)
 
-    def disable(self, name):
-        self._exec(['disable', name])
+    def disable(self, names):
+        self._exec(['disable'] + self._offline() + names)
 
 def main():
     arg_spec = dict(
         names=dict(required=True, aliases=['name']),
         new_only=dict(default='no', type='bool'),
         state=dict(default='enabled', choices=['enabled', 'disabled']),
-        prefix=dict(required=False, default=None)
+        prefix=dict(required=False, default=None),
+        offline=dict(default='no', type='bool')
     )
     module = AnsibleModule(
         argument_spec=arg_spec,
@@ -107,20 +124,16 @@ def main():
     disabled = []
     if state == 'enabled':
         if not new_only:
-            for plugin in enabled_plugins:
-                if plugin not in names:
-                    rabbitmq_plugins.disable(plugin)
-                    disabled.append(plugin)
-
-        for name in names:
-            if name not in enabled_plugins:
-                rabbitmq_plugins.enable(name)
-                enabled.append(name)
+            disabled = [plugin for plugin in enabled_plugins if plugin not in names]
+        enabled = [name for name in names if name not in enabled_plugins]
     else:
-        for plugin in enabled_plugins:
-            if plugin in names:
-                rabbitmq_plugins.disable(plugin)
-                disabled.append(plugin)
+        disabled = [plugin for plugin in enabled_plugins if plugin in names]
+
+    # one call per direction, every call makes the node reload its plugins
+    if disabled:
+        rabbitmq_plugins.disable(disabled)
+    if enabled:
+        rabbitmq_plugins.enable(enabled)
 
     changed = len(enabled) > 0 or len(disabled) > 0
     module.exit_json(changed=changed, enabled=enabled, disabled=disabled)
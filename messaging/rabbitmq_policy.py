@@ -31,7 +31,8 @@ options:
   name:
     description:
       - The name of the policy to manage.
-    required: true
+      - Required unless I(policies) is given.
+    required: false
     default: null
   vhost:
     description:
@@ -41,12 +42,15 @@ options:
   pattern:
     description:
       - A regex of queues to apply the policy to.
-    required: true
+      - Required with I(name) when I(state=present).
+    required: false
     default: null
   tags:
     description:
       - A dict or string describing the policy.
-    required: true
+      - Required with I(name) when I(state=present).
+      - String values holding JSON, such as C(ha-params=2), are decoded before they are compared and set.
+    required: false
     default: null
   priority:
     description:
@@ -63,6 +67,16 @@ options:
       - The state of the policy.
     default: present
     choices: [present, absent]
+  policies:
+    description:
+      - A list of policies to converge in one run instead of I(name). Each item
+        takes C(name) and any of C(vhost), C(pattern), C(tags), C(priority) and
+        C(state). Keys left out default to the module option of the same name.
+      - The policies of every vhost involved are listed once, and only the
+        policies whose pattern, definition or priority differ are set.
+    required: false
+    default: null
+    version_added: "2.1"
 '''
 
 EXAMPLES = '''
@@ -74,16 +88,59 @@ EXAMPLES = '''
 
 - name: ensure the default vhost contains the HA policy
   rabbitmq_policy: name=HA pattern='.*' tags="ha-mode=all"
+
+- name: converge several policies with one listing per vhost
+  rabbitmq_policy:
+    policies:
+      - name: HA
+        pattern: '^ha\\.'
+        tags:
+          ha-mode: all
+      - name: TTL
+        vhost: /staging
+        pattern: '.*'
+        priority: 1
+        tags:
+          message-ttl: 60000
+      - name: old
+        state: absent
 '''
+
+import json
+
+def normalize_tags(tags):
+    """Decode JSON string values, so ha-params=2 is sent and compared as 2."""
+    if not isinstance(tags, dict):
+        return tags
+    normalized = dict()
+    for key, value in tags.items():
+        if isinstance(value, basestring):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        normalized[key] = value
+    return normalized
+
 class RabbitMqPolicy(object):
-    def __init__(self, module, name):
+    def __init__(self, module, name, vhost=None, pattern=None, tags=None, priority=None):
         self._module = module
         self._name = name
-        self._vhost = module.params['vhost']
-        self._pattern = module.params['pattern']
-        self._tags = module.params['tags']
-        self._priority = module.params['priority']
+        # items of policies may set falsy values such as priority 0
+        if vhost is None:
+            vhost = module.params['vhost']
+        if pattern is None:
+            pattern = module.params['pattern']
+        if tags is None:
+            tags = module.params['tags']
+        if priority is None:
+            priority = module.params['priority']
+        self._vhost = vhost
+        self._pattern = pattern
+        self._tags = normalize_tags(tags)
+        self._priority = priority
         self._node = module.params['node']
+        self._current = None
         self._rabbitmqctl = module.get_bin_path('rabbitmqctl', True)
 
     def _exec(self, args, run_in_check_mode=False):
@@ -95,59 +152,115 @@ class RabbitMqPolicy(object):
             return out.splitlines()
         return list()
 
-    def list(self):
-        policies = self._exec(['list_policies'], True)
+    def list_all(self):
+        """All policies of the vhost by name."""
+        policies = dict()
+        for policy in self._exec(['list_policies'], True):
+            fields = policy.split('\t')
+            if len(fields) > 5:
+                # vhost, name, apply-to, pattern, definition, priority
+                del fields[2]
+            try:
+                tags = json.loads(fields[3])
+            except ValueError:
+                self._module.fail_json(msg="Could not parse the definition of policy %s: %s" % (fields[1], fields[3]))
+            policies[fields[1]] = dict(pattern=fields[2], tags=tags, priority=fields[4])
+        return policies
 
-        for policy in policies:
-            policy_name = policy.split('\t')[1]
-            if policy_name == self._name:
-                return True
-        return False
+    def list(self, policies=None):
+        if policies is None:
+            policies = self.list_all()
+        self._current = policies.get(self._name)
+        return self._current is not None
+
+    def has_modifications(self):
+        return self._current != dict(pattern=self._pattern, tags=self._tags, priority=str(self._priority))
 
     def set(self):
-        import json
         args = ['set_policy']
         args.append(self._name)
         args.append(self._pattern)
         args.append(json.dumps(self._tags))
         args.append('--priority')
-        args.append(self._priority)
+        args.append(str(self._priority))
         return self._exec(args)
 
     def clear(self):
         return self._exec(['clear_policy', self._name])
 
 
+def converge_policy(rabbitmq_policy, state, policies=None):
+    changed = False
+    if rabbitmq_policy.list(policies):
+        if state == 'absent':
+            rabbitmq_policy.clear()
+            changed = True
+        elif rabbitmq_policy.has_modifications():
+            rabbitmq_policy.set()
+            changed = True
+    elif state == 'present':
+        rabbitmq_policy.set()
+        changed = True
+    return changed
+
+def converge_policies(module):
+    """Converge the policies option, listing every vhost only once."""
+    params = module.params
+    listings = dict()
+    report = []
+    for item in params['policies']:
+        if not isinstance(item, dict) or not item.get('name'):
+            module.fail_json(msg="Every item of policies must be a dictionary with a name")
+        unknown = set(item) - set(['name', 'vhost', 'pattern', 'tags', 'priority', 'state'])
+        if unknown:
+            module.fail_json(msg="Unsupported keys for policy %s: %s" % (item['name'], ', '.join(sorted(unknown))))
+        vhost = item.get('vhost', params['vhost'])
+        state = item.get('state', params['state'])
+        if state not in ('present', 'absent'):
+            module.fail_json(msg="state of policy %s must be present or absent" % item['name'])
+        pattern = item.get('pattern', params['pattern'])
+        tags = item.get('tags', params['tags'])
+        if state == 'present' and (pattern is None or not isinstance(tags, dict)):
+            module.fail_json(msg="policy %s needs a pattern and a dict of tags" % item['name'])
+        rabbitmq_policy = RabbitMqPolicy(module, item['name'], vhost, pattern, tags,
+                                         item.get('priority', params['priority']))
+
+        if vhost not in listings:
+            listings[vhost] = rabbitmq_policy.list_all()
+        changed = converge_policy(rabbitmq_policy, state, listings[vhost])
+        report.append(dict(name=item['name'], vhost=vhost, state=state, changed=changed))
+
+    module.exit_json(changed=any([policy['changed'] for policy in report]), policies=report)
+
 def main():
     arg_spec = dict(
-        name=dict(required=True),
+        name=dict(),
         vhost=dict(default='/'),
-        pattern=dict(required=True),
-        tags=dict(type='dict', required=True),
+        pattern=dict(),
+        tags=dict(type='dict'),
         priority=dict(default='0'),
         node=dict(default='rabbit'),
         state=dict(default='present', choices=['present', 'absent']),
+        policies=dict(type='list'),
     )
 
     module = AnsibleModule(
         argument_spec=arg_spec,
+        required_one_of=[['name', 'policies']],
+        mutually_exclusive=[['name', 'policies']],
         supports_check_mode=True
     )
 
+    if module.params['policies'] is not None:
+        converge_policies(module)
+
     name = module.params['name']
     state = module.params['state']
+    if state == 'present' and (module.params['pattern'] is None or module.params['tags'] is None):
+        module.fail_json(msg="pattern and tags are required when state is present")
     rabbitmq_policy = RabbitMqPolicy(module, name)
 
-    changed = False
-    if rabbitmq_policy.list():
-        if state == 'absent':
-            rabbitmq_policy.clear()
-            changed = True
-        else:
-            changed = False
-    elif state == 'present':
-        rabbitmq_policy.set()
-        changed = True
+    changed = converge_policy(rabbitmq_policy, state)
 
     module.exit_json(changed=changed, name=name, state=state)
 
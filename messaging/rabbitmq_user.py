@@ -30,7 +30,8 @@ options:
   user:
     description:
       - Name of user to add
-    required: true
+      - Required unless I(users) is given.
+    required: false
     default: null
     aliases: [username, name]
   password:
@@ -89,6 +90,49 @@ options:
     required: false
     default: present
     choices: [present, absent]
+  users:
+    description:
+      - A list of users to converge in one run instead of I(user). Each item
+        takes C(user) (or C(name)), C(password), C(tags) (a list or a comma
+        delimited string), C(state), C(force) and C(permissions).
+      - C(permissions) is a list of dictionaries with C(vhost),
+        C(configure_priv), C(write_priv) and C(read_priv). Only the listed
+        vhosts are managed. Without it the user gets one permission on
+        I(vhost) built from I(configure_priv), I(write_priv) and I(read_priv).
+      - C(state) and C(force) default to the module's I(state) and I(force).
+        With C(force) the password of an existing user is reset instead of
+        the user being recreated.
+      - The users are listed once and the permissions once per vhost, and
+        only the differences are applied.
+    required: false
+    default: null
+    version_added: "2.1"
+  login_host:
+    description:
+      - Host of the management plugin HTTP API. When set, I(users) are read
+        and changed through the API over a single connection instead of
+        starting C(rabbitmqctl) for every read and change.
+    required: false
+    default: null
+    version_added: "2.1"
+  login_port:
+    description:
+      - Port of the management plugin HTTP API.
+    required: false
+    default: 15672
+    version_added: "2.1"
+  login_user:
+    description:
+      - User for the management plugin HTTP API.
+    required: false
+    default: guest
+    version_added: "2.1"
+  login_password:
+    description:
+      - Password for the management plugin HTTP API.
+    required: false
+    default: guest
+    version_added: "2.1"
 '''
 
 EXAMPLES = '''
@@ -100,8 +144,33 @@ EXAMPLES = '''
                  read_priv=.*
                  write_priv=.*
                  state=present
+
+# Converge several users through the management API in one task
+- rabbitmq_user:
+    login_host: localhost
+    users:
+      - user: app
+        password: changeme
+        permissions:
+          - vhost: /
+            configure_priv: .*
+            read_priv: .*
+            write_priv: .*
+          - vhost: /staging
+            read_priv: .*
+      - user: monitoring
+        password: changeme
+        tags: monitoring
+      - user: legacy
+        state: absent
 '''
 
+import base64
+import httplib
+import json
+import socket
+import urllib
+
 class RabbitMqUser(object):
     def __init__(self, module, username, password, tags, vhost, configure_priv, write_priv, read_priv, node):
         self.module = module
@@ -190,9 +259,245 @@ class RabbitMqUser(object):
     def has_permissions_modifications(self):
         return self._permissions != self.permissions
 
+class RabbitMqCtlUsers(object):
+    """Bulk user management through rabbitmqctl.
+
+    Every call boots an Erlang VM, so reads are done once per run and
+    only the changes found by converge_users() are executed.
+    """
+
+    def __init__(self, module, node):
+        self.module = module
+        self.node = node
+        self._rabbitmqctl = module.get_bin_path('rabbitmqctl', True)
+
+    def _exec(self, args, run_in_check_mode=False):
+        if not self.module.check_mode or (self.module.check_mode and run_in_check_mode):
+            cmd = [self._rabbitmqctl, '-q', '-n', self.node]
+            rc, out, err = self.module.run_command(cmd + args, check_rc=True)
+            return out.splitlines()
+        return list()
+
+    def list_users(self):
+        users = dict()
+        for user_tag in self._exec(['list_users'], True):
+            user, tags = user_tag.split('\t')
+            for c in ['[',']',' ']:
+                tags = tags.replace(c, '')
+            users[user] = set([tag for tag in tags.split(',') if tag])
+        return users
+
+    def list_permissions(self, vhosts):
+        permissions = dict()
+        for vhost in vhosts:
+            for perm in self._exec(['list_permissions', '-p', vhost], True):
+                user, configure_priv, write_priv, read_priv = perm.split('\t')
+                permissions[(user, vhost)] = dict(vhost=vhost, configure_priv=configure_priv,
+                                                  write_priv=write_priv, read_priv=read_priv)
+        return permissions
+
+    def add_user(self, user, password, tags):
+        if password is not None:
+            self._exec(['add_user', user, password])
+        else:
+            self._exec(['add_user', user, ''])
+            self._exec(['clear_password', user])
+        if tags:
+            self._exec(['set_user_tags', user] + sorted(tags))
+
+    def update_user(self, user, tags=None, reset_password=False, password=None):
+        if reset_password:
+            if password is not None:
+                self._exec(['change_password', user, password])
+            else:
+                self._exec(['clear_password', user])
+        if tags is not None:
+            self._exec(['set_user_tags', user] + sorted(tags))
+
+    def delete_user(self, user):
+        self._exec(['delete_user', user])
+
+    def set_permissions(self, user, permissions):
+        self._exec(['set_permissions', '-p', permissions['vhost'], user,
+                    permissions['configure_priv'], permissions['write_priv'],
+                    permissions['read_priv']])
+
+class RabbitMqApiUsers(object):
+    """Bulk user management through the management plugin HTTP API.
+
+    All requests go over one HTTP/1.1 connection that is kept open for
+    the whole run.
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.connection = httplib.HTTPConnection(module.params['login_host'],
+                                                 int(module.params['login_port']), timeout=30)
+        credentials = '%s:%s' % (module.params['login_user'], module.params['login_password'])
+        self.headers = {
+            'Authorization': 'Basic %s' % base64.b64encode(credentials),
+            'Content-Type': 'application/json',
+        }
+        self._users = dict()
+
+    def _request(self, method, path, body=None, run_in_check_mode=False):
+        if self.module.check_mode and not run_in_check_mode:
+            return None
+        if body is not None:
+            body = json.dumps(body)
+        try:
+            self.connection.request(method, '/api' + path, body, self.headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (httplib.HTTPException, socket.error), e:
+            self.module.fail_json(msg="Request to the management API failed: %s %s: %s" % (method, path, e))
+        if response.status >= 300:
+            self.module.fail_json(msg="Invalid response from the management API: %s %s: %s" % (method, path, response.status),
+                                  details=data)
+        if data:
+            return json.loads(data)
+        return None
+
+    def _path(self, *parts):
+        return ''.join(['/' + urllib.quote(part, '') for part in parts])
+
+    def list_users(self):
+        users = dict()
+        for user in self._request('GET', '/users', run_in_check_mode=True):
+            tags = user['tags']
+            if isinstance(tags, basestring):
+                tags = tags.split(',')
+            self._users[user['name']] = user
+            users[user['name']] = set([tag for tag in tags if tag])
+        return users
+
+    def list_permissions(self, vhosts):
+        permissions = dict()
+        for perm in self._request('GET', '/permissions', run_in_check_mode=True):
+            if perm['vhost'] in vhosts:
+                permissions[(perm['user'], perm['vhost'])] = dict(vhost=perm['vhost'], configure_priv=perm['configure'],
+                                                                  write_priv=perm['write'], read_priv=perm['read'])
+        return permissions
+
+    def add_user(self, user, password, tags):
+        body = dict(tags=','.join(sorted(tags)))
+        if password is not None:
+            body['password'] = password
+        else:
+            body['password_hash'] = ''
+        self._request('PUT', self._path('users', user), body)
+
+    def update_user(self, user, tags=None, reset_password=False, password=None):
+        current = self._users[user]
+        if tags is None:
+            tags = current['tags']
+        if not isinstance(tags, basestring):
+            tags = ','.join(sorted(tags))
+        body = dict(tags=tags)
+        if reset_password and password is not None:
+            body['password'] = password
+        elif reset_password:
+            body['password_hash'] = ''
+        else:
+            # keep the current password, the API has no call for tags alone
+            body['password_hash'] = current['password_hash']
+            if 'hashing_algorithm' in current:
+                body['hashing_algorithm'] = current['hashing_algorithm']
+        self._request('PUT', self._path('users', user), body)
+
+    def delete_user(self, user):
+        self._request('DELETE', self._path('users', user))
+
+    def set_permissions(self, user, permissions):
+        self._request('PUT', self._path('permissions', permissions['vhost'], user),
+                      dict(configure=permissions['configure_priv'], write=permissions['write_priv'],
+                           read=permissions['read_priv']))
+
+def users_params(module):
+    """Normalize the items of the users option."""
+    params = module.params
+    users = []
+    for item in params['users']:
+        if not isinstance(item, dict):
+            module.fail_json(msg="Items of users must be dictionaries, got %r" % (item,))
+        unknown = set(item) - set(['user', 'name', 'password', 'tags', 'state', 'force', 'permissions'])
+        if unknown:
+            module.fail_json(msg="Unsupported keys for user %s: %s" % (item.get('user', item.get('name')), ', '.join(sorted(unknown))))
+        name = item.get('user', item.get('name'))
+        if not name:
+            module.fail_json(msg="Every item of users needs a user")
+
+        tags = item.get('tags') or []
+        if isinstance(tags, basestring):
+            tags = tags.split(',')
+
+        state = item.get('state', params['state'])
+        if state not in ('present', 'absent'):
+            module.fail_json(msg="state of user %s must be present or absent" % name)
+
+        permissions = []
+        for perm in item.get('permissions', [dict(vhost=params['vhost'],
+                                                  configure_priv=params['configure_priv'],
+                                                  write_priv=params['write_priv'],
+                                                  read_priv=params['read_priv'])]):
+            if not isinstance(perm, dict):
+                module.fail_json(msg="permissions of user %s must be a list of dictionaries" % name)
+            permissions.append(dict(vhost=perm.get('vhost', '/'),
+                                    configure_priv=perm.get('configure_priv', '^$'),
+                                    write_priv=perm.get('write_priv', '^$'),
+                                    read_priv=perm.get('read_priv', '^$')))
+
+        users.append(dict(user=name, password=item.get('password'), tags=set([tag.strip() for tag in tags if tag.strip()]),
+                          state=state, force=module.boolean(item.get('force', params['force'])),
+                          permissions=permissions))
+    return users
+
+def converge_users(users, backend):
+    """Read users and permissions once, apply only the differences and
+    return a per-user report."""
+    vhosts = set()
+    for user in users:
+        if user['state'] == 'present':
+            vhosts.update([perm['vhost'] for perm in user['permissions']])
+
+    current = backend.list_users()
+    current_permissions = dict()
+    if vhosts:
+        current_permissions = backend.list_permissions(sorted(vhosts))
+
+    report = []
+    for user in users:
+        name = user['user']
+        result = dict(user=name, state=user['state'], changed=False)
+        report.append(result)
+
+        if user['state'] == 'absent':
+            if name in current:
+                backend.delete_user(name)
+                result['changed'] = True
+            continue
+
+        if name not in current:
+            backend.add_user(name, user['password'], user['tags'])
+            result['changed'] = True
+        else:
+            tags = None
+            if user['tags'] != current[name]:
+                tags = user['tags']
+            if tags is not None or user['force']:
+                backend.update_user(name, tags, user['force'], user['password'])
+                result['changed'] = True
+
+        for perm in user['permissions']:
+            if current_permissions.get((name, perm['vhost'])) != perm:
+                backend.set_permissions(name, perm)
+                result['changed'] = True
+
+    return report
+
 def main():
     arg_spec = dict(
-        user=dict(required=True, aliases=['username', 'name']),
+        user=dict(aliases=['username', 'name']),
         password=dict(default=None),
         tags=dict(default=None),
         vhost=dict(default='/'),
@@ -201,13 +506,37 @@ def main():
         read_priv=dict(default='^$'),
         force=dict(default='no', type='bool'),
         state=dict(default='present', choices=['present', 'absent']),
-        node=dict(default='rabbit')
+        node=dict(default='rabbit'),
+        users=dict(type='list'),
+        login_host=dict(default=None),
+        login_port=dict(default='15672'),
+        login_user=dict(default='guest'),
+        login_password=dict(default='guest', no_log=True)
     )
     module = AnsibleModule(
         argument_spec=arg_spec,
+        required_one_of=[['user', 'users']],
+        mutually_exclusive=[['user', 'users']],
         supports_check_mode=True
     )
 
+    # add_user takes the password on the command line, keep it out of the
+    # results, including the cmd reported when rabbitmqctl fails
+    passwords = [module.params['password']]
+    users = None
+    if module.params['users'] is not None:
+        users = users_params(module)
+        passwords.extend([user['password'] for user in users])
+    module.no_log_values.update([password for password in passwords if password])
+
+    if users is not None:
+        if module.params['login_host']:
+            backend = RabbitMqApiUsers(module)
+        else:
+            backend = RabbitMqCtlUsers(module, module.params['node'])
+        report = converge_users(users, backend)
+        module.exit_json(changed=any([user['changed'] for user in report]), users=report)
+
     username = module.params['user']
     password = module.params['password']
     tags = module.params['tags']
@@ -31,7 +31,8 @@ options:
   name:
     description:
       - The name of the vhost to manage
-    required: true
+      - Required unless I(vhosts) is given.
+    required: false
     default: null
     aliases: [vhost]
   node:
@@ -51,13 +52,33 @@ options:
       - The state of vhost
     default: present
     choices: [present, absent]
+  vhosts:
+    description:
+      - A list of vhosts to converge in one run instead of I(name). Items are
+        names or dictionaries with C(name) and any of C(tracing) and C(state),
+        which default to the module options of the same name.
+      - The vhosts are listed once and only the missing, unwanted or
+        differently traced ones are changed.
+    required: false
+    default: null
+    version_added: "2.1"
 '''
 
 EXAMPLES = '''
 # Ensure that the vhost /test exists.
 - rabbitmq_vhost: name=/test state=present
+
+# Ensure several vhosts with a single listing.
+- rabbitmq_vhost:
+    vhosts:
+      - /staging
+      - name: /debug
+        tracing: yes
+      - name: /old
+        state: absent
 '''
 
+
 class RabbitMqVhost(object):
     def __init__(self, module, name, tracing, node):
         self.module = module
@@ -75,14 +96,20 @@ class RabbitMqVhost(object):
             return out.splitlines()
         return list()
 
-    def get(self):
-        vhosts = self._exec(['list_vhosts', 'name', 'tracing'], True)
-
-        for vhost in vhosts:
+    def list(self):
+        vhosts = dict()
+        for vhost in self._exec(['list_vhosts', 'name', 'tracing'], True):
             name, tracing = vhost.split('\t')
-            if name == self.name:
-                self._tracing = self.module.boolean(tracing)
-                return True
+            vhosts[name] = self.module.boolean(tracing)
+        return vhosts
+
+    def get(self, vhosts=None):
+        if vhosts is None:
+            vhosts = self.list()
+
+        if self.name in vhosts:
+            self._tracing = vhosts[self.name]
+            return True
         return False
 
     def add(self):
@@ -107,19 +134,66 @@ class RabbitMqVhost(object):
         return self._exec(['trace_off', '-p', self.name])
 
 
+def converge_vhost(rabbitmq_vhost, state, vhosts=None):
+    changed = False
+    if rabbitmq_vhost.get(vhosts):
+        if state == 'absent':
+            rabbitmq_vhost.delete()
+            changed = True
+        else:
+            if rabbitmq_vhost.set_tracing():
+                changed = True
+    elif state == 'present':
+        rabbitmq_vhost.add()
+        rabbitmq_vhost.set_tracing()
+        changed = True
+    return changed
+
+def converge_vhosts(module):
+    """Converge the vhosts option with a single list_vhosts."""
+    params = module.params
+    vhosts = None
+    report = []
+    for item in params['vhosts']:
+        if not isinstance(item, dict):
+            item = dict(name=item)
+        if not item.get('name'):
+            module.fail_json(msg="Every item of vhosts needs a name")
+        unknown = set(item) - set(['name', 'tracing', 'state'])
+        if unknown:
+            module.fail_json(msg="Unsupported keys for vhost %s: %s" % (item['name'], ', '.join(sorted(unknown))))
+        state = item.get('state', params['state'])
+        if state not in ('present', 'absent'):
+            module.fail_json(msg="state of vhost %s must be present or absent" % item['name'])
+
+        rabbitmq_vhost = RabbitMqVhost(module, item['name'],
+                                       module.boolean(item.get('tracing', params['tracing'])), params['node'])
+        if vhosts is None:
+            vhosts = rabbitmq_vhost.list()
+        changed = converge_vhost(rabbitmq_vhost, state, vhosts)
+        report.append(dict(name=item['name'], state=state, changed=changed))
+
+    module.exit_json(changed=any([vhost['changed'] for vhost in report]), vhosts=report)
+
 def main():
     arg_spec = dict(
-        name=dict(required=True, aliases=['vhost']),
+        name=dict(aliases=['vhost']),
         tracing=dict(default='off', aliases=['trace'], type='bool'),
         state=dict(default='present', choices=['present', 'absent']),
         node=dict(default='rabbit'),
+        vhosts=dict(type='list'),
     )
 
     module = AnsibleModule(
         argument_spec=arg_spec,
+        required_one_of=[['name', 'vhosts']],
+        mutually_exclusive=[['name', 'vhosts']],
         supports_check_mode=True
     )
 
+    if module.params['vhosts'] is not None:
+        converge_vhosts(module)
+
     name = module.params['name']
     tracing = module.params['tracing']
     state = module.params['state']
@@ -127,18 +201,7 @@ def main():
 
     rabbitmq_vhost = RabbitMqVhost(module, name, tracing, node)
 
-    changed = False
-    if rabbitmq_vhost.get():
-        if state == 'absent':
-            rabbitmq_vhost.delete()
-            changed = True
-        else:
-            if rabbitmq_vhost.set_tracing():
-                changed = True
-    elif state == 'present':
-        rabbitmq_vhost.add()
-        rabbitmq_vhost.set_tracing()
-        changed = True
+    changed = converge_vhost(rabbitmq_vhost, state)
 
     module.exit_json(changed=changed, name=name, state=state)
 
@@ -78,6 +78,39 @@ options:
     description:
       - the Servicegroup we want to set downtimes/alerts for.
         B(Required) option when using the C(servicegroup_service_downtime) amd C(servicegroup_host_downtime).
+  host_pattern:
+    version_added: "2.1"
+    description:
+      - Regular expression searched in the host names of the Nagios object
+        cache. With the C(downtime) action, downtime is scheduled for the
+        matching services (see I(services) and I(service_pattern)) of all
+        matching hosts, written to the command file in one batch.
+        Can be combined with I(hostgroup).
+    required: false
+    default: null
+  hostgroup:
+    version_added: "2.1"
+    description:
+      - Restrict the hosts expanded from the object cache to the members of
+        this hostgroup. With the C(downtime) action this can be used instead
+        of I(host).
+    required: false
+    default: null
+  service_pattern:
+    version_added: "2.1"
+    description:
+      - Regular expression searched in the service descriptions when the
+        services are expanded from the object cache.
+    required: false
+    default: null
+  object_cache:
+    version_added: "2.1"
+    description:
+      - Path to the Nagios C(objects.cache) file, read once when
+        I(host_pattern) or I(hostgroup) is used.
+        Only required if auto-detection fails.
+    required: false
+    default: auto-detected
   command:
     description:
       - The raw command to send to nagios, which
@@ -107,6 +140,12 @@ EXAMPLES = '''
 # schedule downtime for a few services
 - nagios: action=downtime services=frob,foobar,qeuz host={{ inventory_hostname }}
 
+# schedule downtime for the http services of all web hosts
+- nagios: action=downtime minutes=30 host_pattern='^web[0-9]+\.' service_pattern='^HTTP'
+
+# schedule downtime for all services of the hosts in hostgroup db
+- nagios: action=downtime minutes=30 hostgroup=db service=all
+
 # set 30 minutes downtime for all services in servicegroup foo
 - nagios: action=servicegroup_service_downtime minutes=30 servicegroup=foo host={{ inventory_hostname }}
 
@@ -142,11 +181,12 @@ import ConfigParser
 import types
 import time
 import os.path
+import re
 
 ######################################################################
 
 
-def which_cmdfile():
+def nagios_cfg_paths():
     locations = [
         # rhel
         '/etc/nagios/nagios.cfg',
@@ -171,14 +211,58 @@ def which_cmdfile():
         '/usr/local/icinga/etc/icinga.cfg',
         ]
 
-    for path in locations:
-        if os.path.exists(path):
-            for line in open(path):
-                if line.startswith('command_file'):
-                    return line.split('=')[1].strip()
+    return [path for path in locations if os.path.exists(path)]
+
+
+def nagios_cfg_value(key):
+    for path in nagios_cfg_paths():
+        for line in open(path):
+            if line.startswith(key):
+                return line.split('=')[1].strip()
 
     return None
 
+
+def which_cmdfile():
+    return nagios_cfg_value('command_file')
+
+
+def which_object_cache():
+    return nagios_cfg_value('object_cache_file')
+
+
+def parse_object_cache(path):
+    """
+    Stream the Nagios objects.cache once and index what downtime expansion
+    needs: the service descriptions per host and the members per hostgroup.
+    """
+    services = {}
+    hostgroups = {}
+    obj_type = None
+    attrs = {}
+    for line in open(path):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('define '):
+            obj_type = line[7:].rstrip('{').strip()
+            attrs = {}
+        elif line == '}':
+            if obj_type == 'host' and 'host_name' in attrs:
+                services.setdefault(attrs['host_name'], [])
+            elif obj_type == 'service' and 'host_name' in attrs:
+                services.setdefault(attrs['host_name'], []).append(attrs.get('service_description'))
+            elif obj_type == 'hostgroup' and 'hostgroup_name' in attrs:
+                members = [m.strip() for m in attrs.get('members', '').split(',') if m.strip()]
+                hostgroups[attrs['hostgroup_name']] = members
+            obj_type = None
+        elif obj_type in ('host', 'service', 'hostgroup'):
+            parts = line.split(None, 1)
+            if len(parts) == 2:
+                attrs[parts[0]] = parts[1]
+
+    return services, hostgroups
+
 ######################################################################
 
 
@@ -207,6 +291,10 @@ def main():
             minutes=dict(default=30),
             cmdfile=dict(default=which_cmdfile()),
             services=dict(default=None, aliases=['service']),
+            host_pattern=dict(required=False, default=None),
+            hostgroup=dict(required=False, default=None),
+            service_pattern=dict(required=False, default=None),
+            object_cache=dict(default=which_object_cache()),
             command=dict(required=False, default=None),
             )
         )
@@ -229,14 +317,29 @@ def main():
     # AnsibleModule will verify most stuff, we need to verify
     # 'minutes' and 'service' manually.
 
+    expand = bool(module.params['host_pattern'] or module.params['hostgroup'])
+
     ##################################################################
-    if action not in ['command', 'silence_nagios', 'unsilence_nagios']:
+    if action not in ['command', 'silence_nagios', 'unsilence_nagios'] and not (action == 'downtime' and expand):
         if not host:
             module.fail_json(msg='no host specified for action requiring one')
     ######################################################################
     if action == 'downtime':
+        if expand:
+            if host:
+                module.fail_json(msg='host cannot be combined with host_pattern or hostgroup')
+            if services == 'host':
+                module.fail_json(msg='service=host cannot be combined with host_pattern or hostgroup')
+            if not module.params['object_cache'] or not os.path.exists(module.params['object_cache']):
+                module.fail_json(msg='unable to locate the nagios object cache')
+            for pattern in ['host_pattern', 'service_pattern']:
+                if module.params[pattern]:
+                    try:
+                        re.compile(module.params[pattern])
+                    except re.error, e:
+                        module.fail_json(msg='invalid %s: %s' % (pattern, str(e)))
         # Make sure there's an actual service selected
-        if not services:
+        elif not services:
             module.fail_json(msg='no service selected to set downtime for')
         # Make sure minutes is a number
         try:
@@ -307,6 +410,10 @@ class Nagios(object):
         self.minutes = int(kwargs['minutes'])
         self.cmdfile = kwargs['cmdfile']
         self.command = kwargs['command']
+        self.host_pattern = kwargs['host_pattern']
+        self.hostgroup = kwargs['hostgroup']
+        self.service_pattern = kwargs['service_pattern']
+        self.object_cache = kwargs['object_cache']
 
         if (kwargs['services'] is None) or (kwargs['services'] == 'host') or (kwargs['services'] == 'all'):
             self.services = kwargs['services']
@@ -327,12 +434,34 @@ class Nagios(object):
         Write the given command to the Nagios command file
         """
 
+        self._write_commands([cmd])
+
+    def _write_commands(self, cmds):
+        """
+        Write a batch of commands with one open of the Nagios command file.
+
+        Writes to a FIFO of at most PIPE_BUF bytes are atomic, so the batch
+        is flushed in chunks of whole commands below that size to keep
+        other writers from splitting a command.
+        """
+
+        if not cmds:
+            return
+
         try:
             fp = open(self.cmdfile, 'w')
-            fp.write(cmd)
-            fp.flush()
+            chunk = ''
+            for cmd in cmds:
+                if chunk and len(chunk) + len(cmd) > 4096:
+                    fp.write(chunk)
+                    fp.flush()
+                    chunk = ''
+                chunk += cmd
+            if chunk:
+                fp.write(chunk)
+                fp.flush()
             fp.close()
-            self.command_results.append(cmd.strip())
+            self.command_results.extend([cmd.strip() for cmd in cmds])
         except IOError:
             self.module.fail_json(msg='unable to write to nagios command file',
                                   cmdfile=self.cmdfile)
@@ -430,9 +559,52 @@ class Nagios(object):
         if services is None:
             services = []
 
-        for service in services:
-            dt_cmd_str = self._fmt_dt_str(cmd, host, minutes, svc=service)
-            self._write_command(dt_cmd_str)
+        self._write_commands([self._fmt_dt_str(cmd, host, minutes, svc=service)
+                              for service in services])
+
+    def expand_services(self):
+        """
+        Return the (host, service) pairs selected by host_pattern,
+        hostgroup, services and service_pattern from the object cache.
+        """
+
+        services, hostgroups = parse_object_cache(self.object_cache)
+
+        hosts = services.keys()
+        if self.hostgroup:
+            if self.hostgroup not in hostgroups:
+                self.module.fail_json(msg="hostgroup '%s' not found in %s" % (self.hostgroup, self.object_cache))
+            hosts = hostgroups[self.hostgroup]
+        if self.host_pattern:
+            host_re = re.compile(self.host_pattern)
+            hosts = [host for host in hosts if host_re.search(host)]
+
+        wanted = None
+        if self.services and self.services != 'all':
+            wanted = set(self.services)
+        service_re = None
+        if self.service_pattern:
+            service_re = re.compile(self.service_pattern)
+
+        pairs = []
+        for host in sorted(hosts):
+            for service in services.get(host, []):
+                if wanted is not None and service not in wanted:
+                    continue
+                if service_re is not None and not service_re.search(service):
+                    continue
+                pairs.append((host, service))
+        return pairs
+
+    def schedule_expanded_svc_downtime(self, minutes=30):
+        """
+        Schedule downtime for every service expanded from the object cache,
+        written to the command file as one batch.
+        """
+
+        cmd = "SCHEDULE_SVC_DOWNTIME"
+        self._write_commands([self._fmt_dt_str(cmd, host, minutes, svc=service)
+                              for (host, service) in self.expand_services()])
 
     def schedule_host_downtime(self, host, minutes=30):
         """
@@ -887,7 +1059,9 @@ class Nagios(object):
         """
         # host or service downtime?
         if self.action == 'downtime':
-            if self.services == 'host':
+            if self.host_pattern or self.hostgroup:
+                self.schedule_expanded_svc_downtime(self.minutes)
+            elif self.services == 'host':
                 self.schedule_host_downtime(self.host, self.minutes)
             elif self.services == 'all':
                 self.schedule_host_svc_downtime(self.host, self.minutes)
@@ -937,8 +1111,12 @@ class Nagios(object):
             self.module.fail_json(msg="unknown action specified: '%s'" % \
                                       self.action)
 
+        # an expansion may select nothing, every other action always writes
+        changed = True
+        if self.host_pattern or self.hostgroup:
+            changed = bool(self.command_results)
         self.module.exit_json(nagios_commands=self.command_results,
-                              changed=True)
+                              changed=changed)
 
 ######################################################################
 # import module snippets
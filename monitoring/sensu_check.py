@@ -34,7 +34,27 @@ options:
     description:
       - The name of the check
       - This is the key that is used to determine whether a check exists
-    required: true
+      - Required unless I(checks) is given
+    required: false
+  checks:
+    description:
+      - A hash of check names to hashes of check options (any of the
+        options below from I(state) on, except I(path) and I(backup)),
+        to manage many checks in one run
+      - The check file is loaded once and written at most once
+    required: false
+    default: null
+    version_added: 2.1
+  checks_dir:
+    description:
+      - Store every check in its own C(<name>.json) file in this directory
+        (e.g. C(/etc/sensu/conf.d/checks)) instead of I(path), so unchanged
+        checks are never rewritten
+      - With C(state=absent) the file of the check is removed
+      - The directory needs to exist
+    required: false
+    default: null
+    version_added: 2.1
   state:
     description: Whether the check should be present or not
     choices: [ 'present', 'absent' ]
@@ -170,30 +190,61 @@ EXAMPLES = '''
 # to remove it completely you need to issue a DELETE request to the sensu api.
 - name: check disk
   sensu_check: name=check_disk_capacity
+
+# Manage many checks at once, one file per check
+- name: base checks
+  sensu_check:
+    checks_dir: /etc/sensu/conf.d/checks
+    checks:
+      cpu_load:
+        command: /etc/sensu/plugins/system/cpu-mpstat-metrics.rb
+        metric: yes
+        handlers: relay
+        subscribers: common
+        interval: 60
+      nginx_running:
+        command: /etc/sensu/plugins/processes/check-procs.rb -f /var/run/nginx.pid
+        handlers: default
+        subscribers: nginx
+        interval: 60
+      check_disk_capacity:
+        state: absent
 '''
 
 
-def sensu_check(module, path, name, state='present', backup=False):
-    changed = False
-    reasons = []
+try:
+    import json
+except ImportError:
+    import simplejson as json
 
-    try:
-        import json
-    except ImportError:
-        import simplejson as json
+SIMPLE_OPTS = ['command',
+               'handlers',
+               'subscribers',
+               'interval',
+               'timeout',
+               'handle',
+               'dependencies',
+               'standalone',
+               'publish',
+               'occurrences',
+               'refresh',
+               'aggregate',
+               'low_flap_threshold',
+               'high_flap_threshold',
+               ]
 
+
+def load_config(module, path):
+    """Return the parsed config of path, or None if it does not exist."""
+    stream = None
     try:
         try:
             stream = open(path, 'r')
-            config = json.load(stream.read())
+            return json.loads(stream.read())
         except IOError, e:
             if e.errno is 2:  # File not found, non-fatal
-                if state == 'absent':
-                    reasons.append('file did not exist and state is `absent\'')
-                    return changed, reasons
-                config = {}
-            else:
-                module.fail_json(msg=str(e))
+                return None
+            module.fail_json(msg=str(e))
         except ValueError:
             msg = '{path} contains invalid JSON'.format(path=path)
             module.fail_json(msg=msg)
@@ -201,13 +252,67 @@ def sensu_check(module, path, name, state='present', backup=False):
         if stream:
             stream.close()
 
+
+def write_config(module, path, config, backup=False):
+    if backup and os.path.exists(path):
+        module.backup_local(path)
+    stream = None
+    try:
+        try:
+            stream = open(path, 'w')
+            stream.write(json.dumps(config, indent=2) + '\n')
+        except IOError, e:
+            module.fail_json(msg=str(e))
+    finally:
+        if stream:
+            stream.close()
+
+
+def update_check(check, params):
+    """Bring one check definition in line with params, return the reasons."""
+    reasons = []
+    for opt in SIMPLE_OPTS:
+        if params.get(opt) is not None:
+            if opt not in check or check[opt] != params[opt]:
+                check[opt] = params[opt]
+                reasons.append('`{opt}\' did not exist or was different'.format(opt=opt))
+        else:
+            if opt in check:
+                del check[opt]
+                reasons.append('`{opt}\' was removed'.format(opt=opt))
+
+    if params.get('metric'):
+        if 'type' not in check or check['type'] != 'metric':
+            check['type'] = 'metric'
+            reasons.append('`type\' was not defined or not `metric\'')
+    if not params.get('metric') and 'type' in check:
+        del check['type']
+        reasons.append('`type\' was defined')
+
+    if params.get('subdue_begin') is not None and params.get('subdue_end') is not None:
+        subdue = {'begin': params['subdue_begin'],
+                  'end': params['subdue_end'],
+                  }
+        if 'subdue' not in check or check['subdue'] != subdue:
+            check['subdue'] = subdue
+            reasons.append('`subdue\' did not exist or was different')
+    else:
+        if 'subdue' in check:
+            del check['subdue']
+            reasons.append('`subdue\' was removed')
+    return reasons
+
+
+def converge_config(config, name, state, params):
+    """Apply one check to a loaded config in place, return the reasons."""
+    reasons = []
     if 'checks' not in config:
         if state == 'absent':
             reasons.append('`checks\' section did not exist and state is `absent\'')
-            return changed, reasons
+            return False, reasons
         config['checks'] = {}
-        changed = True
         reasons.append('`checks\' section did not exist')
+    changed = bool(reasons)
 
     if state == 'absent':
         if name in config['checks']:
@@ -217,82 +322,133 @@ def sensu_check(module, path, name, state='present', backup=False):
 
     if state == 'present':
         if name not in config['checks']:
-            check = {}
-            config['checks'][name] = check
+            config['checks'][name] = {}
             changed = True
             reasons.append('check was absent and state is `present\'')
-        else:
-            check = config['checks'][name]
-        simple_opts = ['command',
-                       'handlers',
-                       'subscribers',
-                       'interval',
-                       'timeout',
-                       'handle',
-                       'dependencies',
-                       'standalone',
-                       'publish',
-                       'occurrences',
-                       'refresh',
-                       'aggregate',
-                       'low_flap_threshold',
-                       'high_flap_threshold',
-                       ]
-        for opt in simple_opts:
-            if module.params[opt] is not None:
-                if opt not in check or check[opt] != module.params[opt]:
-                    check[opt] = module.params[opt]
-                    changed = True
-                    reasons.append('`{opt}\' did not exist or was different'.format(opt=opt))
-            else:
-                if opt in check:
-                    del check[opt]
-                    changed = True
-                    reasons.append('`{opt}\' was removed'.format(opt=opt))
-
-        if module.params['metric']:
-            if 'type' not in check or check['type'] != 'metric':
-                check['type'] = 'metric'
-                changed = True
-                reasons.append('`type\' was not defined or not `metric\'')
-        if not module.params['metric'] and 'type' in check:
-            del check['type']
+        check_reasons = update_check(config['checks'][name], params)
+        if check_reasons:
             changed = True
-            reasons.append('`type\' was defined')
-
-        if module.params['subdue_begin'] is not None and module.params['subdue_end'] is not None:
-            subdue = {'begin': module.params['subdue_begin'],
-                      'end': module.params['subdue_end'],
-                      }
-            if 'subdue' not in check or check['subdue'] != subdue:
-                check['subdue'] = subdue
-                changed = True
-                reasons.append('`subdue\' did not exist or was different')
-        else:
-            if 'subdue' in check:
-                del check['subdue']
-                changed = True
-                reasons.append('`subdue\' was removed')
+            reasons.extend(check_reasons)
+
+    return changed, reasons
+
+
+def sensu_check(module, path, name, state='present', backup=False):
+    config = load_config(module, path)
+    if config is None:
+        if state == 'absent':
+            return False, ['file did not exist and state is `absent\'']
+        config = {}
+
+    changed, reasons = converge_config(config, name, state, module.params)
 
     if changed and not module.check_mode:
+        write_config(module, path, config, backup)
+
+    return changed, reasons
+
+
+def sensu_checks(module, path, checks, backup=False):
+    """Converge all checks against one load and at most one dump of path."""
+    config = load_config(module, path)
+    existed = config is not None
+    if config is None:
+        config = {}
+
+    changed = False
+    reasons = {}
+    for name in sorted(checks.keys()):
+        params = checks[name]
+        if not existed and params['state'] == 'absent':
+            continue
+        check_changed, check_reasons = converge_config(config, name, params['state'], params)
+        if check_changed:
+            changed = True
+            reasons[name] = check_reasons
+
+    if changed and not module.check_mode:
+        write_config(module, path, config, backup)
+
+    return changed, reasons
+
+
+def remove_check_file(module, path, backup=False):
+    """Remove the file holding a single check, return the reasons."""
+    if not os.path.exists(path):
+        return False, ['check file did not exist and state is `absent\'']
+    if not module.check_mode:
         if backup:
             module.backup_local(path)
-        try:
-            try:
-                stream = open(path, 'w')
-                stream.write(json.dumps(config, indent=2) + '\n')
-            except IOError, e:
-                module.fail_json(msg=str(e))
-        finally:
-            if stream:
-                stream.close()
+        os.remove(path)
+    return True, ['check file was present and state is `absent\'']
+
+
+def sensu_checks_split(module, checks_dir, checks, backup=False):
+    """
+    Keep every check in its own file below checks_dir, so unchanged checks
+    are never rewritten.
+    """
+    changed = False
+    reasons = {}
+    for name in sorted(checks.keys()):
+        params = checks[name]
+        path = os.path.join(checks_dir, '%s.json' % name)
+        if params['state'] == 'absent':
+            check_changed, check_reasons = remove_check_file(module, path, backup)
+            if check_changed:
+                changed = True
+                reasons[name] = check_reasons
+            continue
+        config = load_config(module, path)
+        if config is None:
+            config = {}
+        check_changed, check_reasons = converge_config(config, name, 'present', params)
+        if check_changed:
+            changed = True
+            reasons[name] = check_reasons
+            if not module.check_mode:
+                write_config(module, path, config, backup)
 
     return changed, reasons
 
 
+def check_params(module, arg_spec, name, opts):
+    """Validate and type one entry of the checks option like module options."""
+    if opts is None:
+        opts = {}
+    if not isinstance(opts, dict):
+        module.fail_json(msg="check {name} must be a hash of options".format(name=name))
+    params = {'state': 'present', 'metric': False}
+    for key, value in opts.items():
+        if key not in arg_spec or key in ['name', 'path', 'backup', 'checks', 'checks_dir']:
+            module.fail_json(msg="unsupported option `{key}' for check {name}".format(key=key, name=name))
+        vtype = arg_spec[key]['type']
+        try:
+            if value is None:
+                pass
+            elif vtype == 'bool':
+                value = module.boolean(value)
+            elif vtype == 'int':
+                value = int(value)
+            elif vtype == 'list' and not isinstance(value, list):
+                value = [v.strip() for v in str(value).split(',')]
+        except ValueError:
+            module.fail_json(msg="option `{key}' of check {name} must be {vtype}".format(key=key, name=name, vtype=vtype))
+        params[key] = value
+    if params['state'] not in ['present', 'absent']:
+        module.fail_json(msg="state of check {name} must be present or absent".format(name=name))
+    if params['state'] != 'absent' and params.get('command') is None:
+        module.fail_json(msg="missing required command for check {name}".format(name=name))
+    if (params.get('subdue_begin') is None) != (params.get('subdue_end') is None):
+        module.fail_json(msg="subdue_begin and subdue_end must be given together for check {name}".format(name=name))
+    return params
+
+
 def main():
 
-    arg_spec = {'name':         {'type': 'str', 'required': True},
+    arg_spec = {'name':         {'type': 'str'},
+                'checks':       {'type': 'dict'},
+                'checks_dir':   {'type': 'str'},
                 'path':         {'type': 'str', 'default': '/etc/sensu/conf.d/checks.json'},
                 'state':        {'type': 'str', 'default': 'present', 'choices': ['present', 'absent']},
                 'backup':       {'type': 'bool', 'default': 'no'},
@@ -319,14 +475,35 @@ def main():
 
     module = AnsibleModule(argument_spec=arg_spec,
                            required_together=required_together,
+                           mutually_exclusive=[['name', 'checks']],
+                           required_one_of=[['name', 'checks']],
                            supports_check_mode=True)
-    if module.params['state'] != 'absent' and module.params['command'] is None:
-        module.fail_json(msg="missing required arguments: %s" % ",".join(['command']))
 
     path = module.params['path']
     name = module.params['name']
     state = module.params['state']
     backup = module.params['backup']
+    checks_dir = module.params['checks_dir']
+
+    if module.params['checks'] is not None:
+        checks = {}
+        for check_name, opts in module.params['checks'].items():
+            checks[check_name] = check_params(module, arg_spec, check_name, opts)
+        if checks_dir:
+            changed, reasons = sensu_checks_split(module, checks_dir, checks, backup)
+            path = checks_dir
+        else:
+            changed, reasons = sensu_checks(module, path, checks, backup)
+        module.exit_json(path=path, changed=changed, msg='OK', reasons=reasons)
+
+    if module.params['state'] != 'absent' and module.params['command'] is None:
+        module.fail_json(msg="missing required arguments: %s" % ",".join(['command']))
+
+    if checks_dir:
+        path = os.path.join(checks_dir, '%s.json' % name)
+        if state == 'absent':
+            changed, reasons = remove_check_file(module, path, backup)
+            module.exit_json(path=path, changed=changed, msg='OK', name=name, reasons=reasons)
 
     changed, reasons = sensu_check(module, path, name, state, backup)
 
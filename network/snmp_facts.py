@@ -91,11 +91,14 @@ EXAMPLES = '''
 from ansible.module_utils.basic import *
 from collections import defaultdict
 
-try:
-    from pysnmp.entity.rfc3413.oneliner import cmdgen
-    has_pysnmp = True
-except:
-    has_pysnmp = False
+def import_pysnmp(module):
+    # pysnmp loads its MIB machinery on import, leave that until the
+    # arguments are known to be usable
+    global cmdgen
+    try:
+        from pysnmp.entity.rfc3413.oneliner import cmdgen
+    except ImportError:
+        module.fail_json(msg='Missing required pysnmp module (check docs)')
 
 class DefineOid(object):
 
@@ -191,11 +194,6 @@ def main():
 
     m_args = module.params
 
-    if not has_pysnmp:
-        module.fail_json(msg='Missing required pysnmp module (check docs)')
-
-    cmdGen = cmdgen.CommandGenerator()
-
     # Verify that we receive a community when using snmp v2
     if m_args['version'] == "v2" or m_args['version'] == "v2c":
         if m_args['community'] == False:
@@ -208,7 +206,10 @@ def main():
         if m_args['level'] == "authPriv" and m_args['privacy'] == None:
             module.fail_json(msg='Privacy algorithm not set when using authPriv')
 
-            
+    import_pysnmp(module)
+    cmdGen = cmdgen.CommandGenerator()
+
+    if m_args['version'] == "v3":
         if m_args['integrity'] == "sha":
             integrity_proto = cmdgen.usmHMACSHAAuthProtocol
         elif m_args['integrity'] == "md5":
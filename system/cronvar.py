@@ -37,14 +37,25 @@ version_added: "2.0"
 options:
   name:
     description:
-      - Name of the crontab variable.
+      - Name of the crontab variable. Required unless C(variables) is given.
     default: null
-    required: true
+    required: false
   value:
     description:
       - The value to set this variable to.  Required if state=present.
     required: false
     default: null
+  variables:
+    description:
+      - A hash of variable names and values to manage in one pass, instead
+        of C(name) and C(value). With C(state=present) variables with a null
+        value are removed, with C(state=absent) all listed variables are
+        removed.
+      - The crontab is read and parsed once and written (and installed)
+        at most once, only if its content changed.
+    required: false
+    default: null
+    version_added: "2.1"
   insertafter:
     required: false
     default: null
@@ -96,6 +107,13 @@ EXAMPLES = '''
 # Adds a variable to a file under /etc/cron.d
 - cronvar: name="LOGFILE" value="/var/log/yum-autoupdate.log"
         user="root" cron_file=ansible_yum-autoupdate
+
+# Set several variables at once and drop an obsolete one
+- cronvar:
+    variables:
+      SHELL: /bin/bash
+      MAILTO: ops@example.com
+      LEGACY: null
 '''
 
 import os
@@ -123,6 +141,9 @@ class CronVar(object):
         if self.user is None:
             self.user = 'root'
         self.lines = None
+        self.parsed = None
+        self.index = None
+        self.rendered = None
         self.wordchars = ''.join(chr(x) for x in range(128) if chr(x) not in ('=', "'", '"', ))
         # select whether we dump additional debug info through syslog
         self.syslogging = False
@@ -145,12 +166,13 @@ class CronVar(object):
                 f.close()
             except IOError, e:
                 # cron file does not exist
-                return
+                pass
             except:
                 raise CronVarError("Unexpected error:", sys.exc_info()[0])
         else:
-            # using safely quoted shell for now, but this really should be two non-shell calls instead.  FIXME
-            (rc, out, err) = self.module.run_command(self._read_user_execute(), use_unsafe_shell=True)
+            # only the su based platforms still need a shell
+            cmd = self._read_user_execute()
+            (rc, out, err) = self.module.run_command(cmd, use_unsafe_shell=isinstance(cmd, basestring))
 
             if rc != 0 and rc != 1: # 1 can mean that there are no jobs.
                 raise CronVarError("Unable to read crontab")
@@ -164,6 +186,31 @@ class CronVar(object):
                     self.lines.append(l)
                 count += 1
 
+        self.parse()
+        self.rendered = self.render()
+
+    def parse(self):
+        """
+        Parse every line once, keeping (name, value) or None per line and
+        an index of the lines holding each variable name.
+        """
+        self.parsed = []
+        for l in self.lines:
+            try:
+                self.parsed.append(self.parse_for_var(l))
+            except CronVarError:
+                self.parsed.append(None)
+        self.reindex()
+
+    def reindex(self):
+        self.index = {}
+        for (lineno, var) in enumerate(self.parsed):
+            if var is not None:
+                self.index.setdefault(var[0], []).append(lineno)
+
+    def changed(self):
+        return self.render() != self.rendered
+
     def log_message(self, message):
         if self.syslogging:
             syslog.syslog(syslog.LOG_NOTICE, 'ansible: "%s"' % message)
@@ -189,8 +236,8 @@ class CronVar(object):
 
         # Add the entire crontab back to the user crontab
         if not self.cron_file:
-            # quoting shell args for now but really this should be two non-shell calls.  FIXME
-            (rc, out, err) = self.module.run_command(self._write_execute(path), use_unsafe_shell=True)
+            cmd = self._write_execute(path)
+            (rc, out, err) = self.module.run_command(cmd, use_unsafe_shell=isinstance(cmd, basestring))
             os.unlink(path)
 
             if rc != 0:
@@ -217,64 +264,55 @@ class CronVar(object):
         raise CronVarError("Not a variable.")
 
     def find_variable(self, name):
-        comment = None
-        for l in self.lines:
-            try:
-                (varname, value) = self.parse_for_var(l)
-                if varname == name:
-                    return value
-            except CronVarError:
-                pass
+        if name in self.index:
+            return self.parsed[self.index[name][0]][1]
         return None
 
     def get_var_names(self):
-        var_names = []
-        for l in self.lines:
-            try:
-                (var_name, _) = self.parse_for_var(l)
-                var_names.append(var_name)
-            except CronVarError:
-                pass
-        return var_names
+        return [var[0] for var in self.parsed if var is not None]
 
     def add_variable(self, name, value, insertbefore, insertafter):
+        self.add_variables([(name, value)], insertbefore, insertafter)
+
+    def add_variables(self, variables, insertbefore, insertafter):
+        """
+        Insert a block of (name, value) pairs at the top of the crontab, or
+        before/after every definition of the insertbefore/insertafter variable.
+        """
+        block = [("%s=%s" % (name, value), (name, value)) for (name, value) in variables]
         if insertbefore is None and insertafter is None:
-            # Add the variable to the top of the file.
-            self.lines.insert(0, "%s=%s" % (name, value))
+            # Add the variables to the top of the file.
+            entries = block + list(zip(self.lines, self.parsed))
         else:
-            newlines = []
-            for l in self.lines:
-                try:
-                    (varname, _) = self.parse_for_var(l) # Throws if not a var line
-                    if varname == insertbefore:
-                        newlines.append("%s=%s" % (name, value))
-                        newlines.append(l)
-                    elif varname == insertafter:
-                        newlines.append(l)
-                        newlines.append("%s=%s" % (name, value))
-                    else:
-                        raise CronVarError # Append.
-                except CronVarError:
-                    newlines.append(l)
-
-            self.lines = newlines
+            entries = []
+            for (l, var) in zip(self.lines, self.parsed):
+                if var is not None and var[0] == insertbefore:
+                    entries.extend(block)
+                    entries.append((l, var))
+                elif var is not None and var[0] == insertafter:
+                    entries.append((l, var))
+                    entries.extend(block)
+                else:
+                    entries.append((l, var))
+
+        self.lines = [l for (l, var) in entries]
+        self.parsed = [var for (l, var) in entries]
+        self.reindex()
 
     def remove_variable(self, name):
         self.update_variable(name, None, remove=True)
 
     def update_variable(self, name, value, remove=False):
-        newlines = []
-        for l in self.lines:
-            try:
-                (varname, _) = self.parse_for_var(l) # Throws if not a var line
-                if varname != name:
-                    raise CronVarError # Append.
-                if not remove:
-                    newlines.append("%s=%s" % (name, value))
-            except CronVarError:
-                newlines.append(l)
-
-        self.lines = newlines
+        lines = self.index.get(name, [])
+        if remove:
+            for lineno in reversed(lines):
+                del self.lines[lineno]
+                del self.parsed[lineno]
+            self.reindex()
+        else:
+            for lineno in lines:
+                self.lines[lineno] = "%s=%s" % (name, value)
+                self.parsed[lineno] = (name, value)
 
     def render(self):
         """
@@ -287,32 +325,31 @@ class CronVar(object):
 
     def _read_user_execute(self):
         """
-        Returns the command line for reading a crontab
+        Returns the command for reading a crontab, a shell command line
+        where su is needed or an argument list otherwise
         """
-        user = ''
-
         if self.user:
             if platform.system() == 'SunOS':
                 return "su %s -c '%s -l'" % (pipes.quote(self.user), pipes.quote(CRONCMD))
             elif platform.system() == 'AIX':
-                return "%s -l %s" % (pipes.quote(CRONCMD), pipes.quote(self.user))
+                return [CRONCMD, '-l', self.user]
             elif platform.system() == 'HP-UX':
-                return "%s %s %s" % (CRONCMD , '-l', pipes.quote(self.user))
+                return [CRONCMD, '-l', self.user]
             else:
-                user = '-u %s' % pipes.quote(self.user)
-        return "%s %s %s" % (CRONCMD , user, '-l')
+                return [CRONCMD, '-u', self.user, '-l']
+        return [CRONCMD, '-l']
 
     def _write_execute(self, path):
         """
-        Return the command line for writing a crontab
+        Return the command for writing a crontab, a shell command line
+        where su is needed or an argument list otherwise
         """
-        user = ''
         if self.user:
             if platform.system() in ['SunOS', 'HP-UX', 'AIX']:
                 return "chown %s %s ; su '%s' -c '%s %s'" % (pipes.quote(self.user), pipes.quote(path), pipes.quote(self.user), CRONCMD, pipes.quote(path))
             else:
-                user = '-u %s' % pipes.quote(self.user)
-        return "%s %s %s" % (CRONCMD , user, pipes.quote(path))
+                return [CRONCMD, '-u', self.user, path]
+        return [CRONCMD, path]
 
 #==================================================
 
@@ -333,8 +370,9 @@ def main():
 
     module = AnsibleModule(
         argument_spec=dict(
-            name=dict(required=True),
+            name=dict(required=False),
             value=dict(required=False),
+            variables=dict(required=False, type='dict'),
             user=dict(required=False),
             cron_file=dict(required=False),
             insertafter=dict(default=None),
@@ -342,12 +380,13 @@ def main():
             state=dict(default='present', choices=['present', 'absent']),
             backup=dict(default=False, type='bool'),
         ),
-        mutually_exclusive=[['insertbefore', 'insertafter']],
+        mutually_exclusive=[['insertbefore', 'insertafter'], ['name', 'variables']],
         supports_check_mode=False,
     )
 
     name = module.params['name']
     value = module.params['value']
+    variables = module.params['variables']
     user = module.params['user']
     cron_file = module.params['cron_file']
     insertafter = module.params['insertafter']
@@ -369,37 +408,50 @@ def main():
 
     # --- user input validation ---
 
-    if name is None and ensure_present:
-        module.fail_json(msg="You must specify 'name' to insert a new cron variabale")
+    if variables is not None:
+        if not ensure_present:
+            variables = dict((var_name, None) for var_name in variables)
+    else:
+        if name is None and ensure_present:
+            module.fail_json(msg="You must specify 'name' to insert a new cron variabale")
 
-    if value is None and ensure_present:
-        module.fail_json(msg="You must specify 'value' to insert a new cron variable")
+        if value is None and ensure_present:
+            module.fail_json(msg="You must specify 'value' to insert a new cron variable")
 
-    if name is None and not ensure_present:
-        module.fail_json(msg="You must specify 'name' to remove a cron variable")
+        if name is None and not ensure_present:
+            module.fail_json(msg="You must specify 'name' to remove a cron variable")
 
     # if requested make a backup before making a change
     if backup:
         (_, backup_file) = tempfile.mkstemp(prefix='cronvar')
         cronvar.write(backup_file)
 
-    if cronvar.cron_file and not name and not ensure_present:
+    if cronvar.cron_file and not name and variables is None and not ensure_present:
         changed = cronvar.remove_job_file()
         module.exit_json(changed=changed, cron_file=cron_file, state=state)
 
-    old_value = cronvar.find_variable(name)
-
-    if ensure_present:
-        if old_value is None:
-            cronvar.add_variable(name, value, insertbefore, insertafter)
-            changed = True
-        elif old_value != value:
-            cronvar.update_variable(name, value)
-            changed = True
-    else:
-        if old_value is not None:
-            cronvar.remove_variable(name)
-            changed = True
+    if variables is None:
+        if ensure_present:
+            variables = {name: value}
+        else:
+            variables = {name: None}
+
+    new_vars = []
+    for var_name in sorted(variables.keys()):
+        var_value = variables[var_name]
+        old_value = cronvar.find_variable(var_name)
+        if var_value is None:
+            if old_value is not None:
+                cronvar.remove_variable(var_name)
+        elif old_value is None:
+            new_vars.append((var_name, var_value))
+        elif old_value != var_value:
+            cronvar.update_variable(var_name, var_value)
+    if new_vars:
+        cronvar.add_variables(new_vars, insertbefore, insertafter)
+
+    # skip the write and crontab install when nothing would change
+    changed = cronvar.changed()
 
     res_args = {
         "vars": cronvar.get_var_names(),
@@ -39,8 +39,9 @@ requirements: [ debconf, debconf-utils ]
 options:
   name:
     description:
-      - Name of package to configure.
-    required: true
+      - Name of package to configure. Required unless C(selections) is
+        given, where it is the default package of the listed questions.
+    required: false
     default: null
     aliases: ['pkg']
   question:
@@ -68,6 +69,16 @@ options:
     required: false
     default: False
     aliases: []
+  selections:
+    description:
+      - A list of hashes with the keys C(name), C(question), C(vtype) and
+        C(value) to preseed in one run, instead of a single C(question).
+      - The current selections of all packages are read with one
+        debconf-get-selections call and all changed answers are fed to a
+        single debconf-set-selections call.
+    required: false
+    default: null
+    version_added: "2.1"
 author: "Brian Coca (@bcoca)"
 
 '''
@@ -84,6 +95,14 @@ debconf: name='oracle-java7-installer' question='shared/accepted-oracle-license-
 
 # Specifying package you can register/return the list of questions and current values
 debconf: name='tzdata'
+
+# Preseed several questions at once
+debconf:
+  name: postfix
+  selections:
+    - { question: postfix/main_mailer_type, vtype: select, value: 'Internet Site' }
+    - { question: postfix/mailname, vtype: string, value: mail.example.com }
+    - { name: tzdata, question: tzdata/Areas, vtype: select, value: Etc }
 '''
 
 def get_selections(module, pkg):
@@ -113,17 +132,86 @@ def set_selection(module, pkg, question, vtype, value, unseen):
 
     return module.run_command(cmd, data=data)
 
+def get_all_selections(module):
+    cmd = [module.get_bin_path('debconf-get-selections', True)]
+    rc, out, err = module.run_command(cmd)
+
+    if rc != 0:
+        module.fail_json(msg=err)
+
+    selections = {}
+
+    for line in out.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        # owner, question, type and value are separated by tabs
+        parts = line.split('\t', 3)
+        if len(parts) < 3:
+            continue
+        if len(parts) == 3:
+            parts.append('')
+        selections[parts[1]] = parts[3]
+
+    return selections
+
+def set_selections(module, selections, unseen):
+
+    setsel = module.get_bin_path('debconf-set-selections', True)
+    cmd = [setsel]
+    if unseen:
+        cmd.append('-u')
+
+    data = '\n'.join([' '.join([pkg, question, vtype, value]) for (pkg, question, vtype, value) in selections])
+
+    return module.run_command(cmd, data=data + '\n')
+
+def preseed(module, pkg, selections, unseen):
+
+    vtypes = ['string', 'password', 'boolean', 'select',  'multiselect', 'note', 'error', 'title', 'text']
+    wanted = []
+    for item in selections:
+        if not isinstance(item, dict):
+            module.fail_json(msg="each item in selections must be a hash: %s" % item)
+        item_pkg = item.get('name', pkg)
+        question = item.get('question')
+        vtype = item.get('vtype')
+        value = item.get('value')
+        if item_pkg is None or question is None or vtype is None or value is None:
+            module.fail_json(msg="each selection needs a name, question, vtype and value: %s" % item)
+        if vtype not in vtypes:
+            module.fail_json(msg="vtype must be one of %s: %s" % (', '.join(vtypes), item))
+        if isinstance(value, bool):
+            value = str(value).lower()
+        wanted.append((item_pkg, question, vtype, str(value)))
+
+    prev = get_all_selections(module)
+
+    changes = [sel for sel in wanted if sel[1] not in prev or prev[sel[1]] != sel[3]]
+
+    msg = ""
+    if changes and not module.check_mode:
+        rc, msg, e = set_selections(module, changes, unseen)
+        if rc:
+            module.fail_json(msg=e)
+
+    curr = dict((question, value) for (item_pkg, question, vtype, value) in changes)
+    previous = dict((question, prev.get(question, '')) for (item_pkg, question, vtype, value) in changes)
+
+    module.exit_json(changed=bool(changes), msg=msg, current=curr, previous=previous)
+
 def main():
 
     module = AnsibleModule(
         argument_spec = dict(
-           name = dict(required=True, aliases=['pkg'], type='str'),
+           name = dict(required=False, aliases=['pkg'], type='str'),
            question = dict(required=False, aliases=['setting', 'selection'], type='str'),
            vtype = dict(required=False, type='str', choices=['string', 'password', 'boolean', 'select',  'multiselect', 'note', 'error', 'title', 'text']),
            value= dict(required=False, type='str'),
            unseen = dict(required=False, type='bool'),
+           selections = dict(required=False, type='list'),
         ),
         required_together = ( ['question','vtype', 'value'],),
+        mutually_exclusive = ( ['question', 'selections'],),
         supports_check_mode=True,
     )
 
@@ -134,6 +222,12 @@ def main():
     value    = module.params["value"]
     unseen   = module.params["unseen"]
 
+    if module.params["selections"] is not None:
+        preseed(module, pkg, module.params["selections"], unseen)
+
+    if pkg is None:
+        module.fail_json(msg="name is required unless selections is given")
+
     prev = get_selections(module, pkg)
 
     changed = False
@@ -102,6 +102,7 @@ options:
         Set force to true to override this behaviour
 notes:
   - "Requires cli tools for GlusterFS on servers"
+  - "Cluster state is read through the cli C(--xml) output"
   - "Will add new bricks, but not remove them"
 author: "Taneli Leppä (@rosmo)"
 """
@@ -132,8 +133,11 @@ EXAMPLES = """
 """
 
 import shutil
+import subprocess
 import time
 import socket
+import threading
+from xml.etree import ElementTree
 
 glusterbin = ''
 
@@ -170,59 +174,49 @@ def run_gluster_yes(gargs):
         module.fail_json(msg='error running gluster (%s) command (rc=%d): %s' % (' '.join(args), rc, out or err))
     return out
 
+def run_gluster_xml(gargs):
+    global module
+    out = run_gluster(gargs + [ '--xml' ])
+    try:
+        root = ElementTree.fromstring(out)
+    except Exception, e:
+        module.fail_json(msg='error parsing gluster (%s) xml output: %s' % (' '.join(gargs), str(e)))
+    if root.findtext('opRet', '0') != '0':
+        module.fail_json(msg='error running gluster (%s) command: %s' % (' '.join(gargs), root.findtext('opErrstr')))
+    return root
+
 def get_peers():
-    out = run_gluster([ 'peer', 'status'])
-    i = 0
+    root = run_gluster_xml([ 'peer', 'status' ])
     peers = {}
-    hostname = None
-    uuid = None
-    state = None
-    for row in out.split('\n'):
-        if ': ' in row:
-            key, value = row.split(': ')
-            if key.lower() == 'hostname':
-                hostname = value
-            if key.lower() == 'uuid':
-                uuid = value
-            if key.lower() == 'state':
-                state = value
-                peers[hostname] = [ uuid, state ]
+    for peer in root.findall('peerStatus/peer'):
+        if peer.findtext('connected') == '1':
+            connected = 'Connected'
+        else:
+            connected = 'Disconnected'
+        state = '%s (%s)' % (peer.findtext('stateStr'), connected)
+        peers[peer.findtext('hostname')] = [ peer.findtext('uuid'), state ]
     return peers
 
 def get_volumes():
-    out = run_gluster([ 'volume', 'info' ])
+    root = run_gluster_xml([ 'volume', 'info' ])
 
+    transports = { '0': 'tcp', '1': 'rdma', '2': 'tcp,rdma' }
     volumes = {}
-    volume = {}
-    for row in out.split('\n'):
-        if ': ' in row:
-            key, value = row.split(': ')
-            if key.lower() == 'volume name':
-                volume['name'] = value
-                volume['options'] = {}
-                volume['quota'] = False
-            if key.lower() == 'volume id':
-                volume['id'] = value
-            if key.lower() == 'status':
-                volume['status'] = value
-            if key.lower() == 'transport-type':
-                volume['transport'] = value
-            if key.lower() != 'bricks' and key.lower()[:5] == 'brick':
-                if not 'bricks' in volume:
-                    volume['bricks'] = []
-                volume['bricks'].append(value)
-            # Volume options
-            if '.' in key:
-                if not 'options' in volume:
-                    volume['options'] = {}
-                volume['options'][key] = value
-                if key == 'features.quota' and value == 'on':
-                    volume['quota'] = True
-        else:
-            if row.lower() != 'bricks:' and row.lower() != 'options reconfigured:':
-                if len(volume) > 0:
-                    volumes[volume['name']] = volume
-                volume = {}
+    for vol in root.findall('volInfo/volumes/volume'):
+        volume = {}
+        volume['name'] = vol.findtext('name')
+        volume['id'] = vol.findtext('id')
+        volume['status'] = vol.findtext('statusStr')
+        volume['transport'] = transports.get(vol.findtext('transport'), vol.findtext('transport'))
+        volume['bricks'] = []
+        for brick in vol.findall('bricks/brick'):
+            # newer releases nest the brick name, older ones only have text
+            volume['bricks'].append(brick.findtext('name') or brick.text.strip())
+        volume['options'] = {}
+        for option in vol.findall('options/option'):
+            volume['options'][option.findtext('name')] = option.findtext('value')
+        volume['quota'] = volume['options'].get('features.quota') == 'on'
+        volumes[volume['name']] = volume
     return volumes
 
 def get_quotas(name, nofail):
@@ -239,28 +233,92 @@ def get_quotas(name, nofail):
             quotas[q[0]] = q[1]
     return quotas
 
-def wait_for_peer(host):
-    for x in range(0, 4):
+class GlusterCluster(object):
+    """
+    Peer and volume state of the cluster, fetched once through gluster's
+    XML output and reused for the whole run. Every gluster query takes a
+    cluster-wide lock, so callers refresh only what they changed.
+    """
+
+    def __init__(self):
+        self.peers = {}
+        self.volumes = {}
+        self._quotas = {}
+        self.refresh()
+
+    def refresh(self, peers=True, volumes=True):
+        if peers:
+            self.peers = get_peers()
+        if volumes:
+            self.volumes = get_volumes()
+            self._quotas = {}
+
+    def quotas(self, name, nofail=False):
+        if name not in self._quotas:
+            quotas = get_quotas(name, nofail)
+            if not quotas and nofail:
+                return quotas
+            self._quotas[name] = quotas
+        return self._quotas[name]
+
+def wait_for_peers(hosts):
+    # one peer status per round covers every host we are waiting on
+    pending = list(hosts)
+    for x in range(0, 4 + len(pending)):
         peers = get_peers()
-        if host in peers and peers[host][1].lower().find('peer in cluster') != -1:
-            return True
+        pending = [ host for host in pending
+                    if host not in peers or peers[host][1].lower().find('peer in cluster') == -1 ]
+        if not pending:
+            break
         time.sleep(1)
-    return False
+    return pending
 
-def probe(host, myhostname):
-    global module
-    run_gluster([ 'peer', 'probe', host ])
-    if not wait_for_peer(host):
-        module.fail_json(msg='failed to probe peer %s on %s' % (host, myhostname))
-    changed = True
+def probe(host, errors):
+    global glusterbin
+    # probes run in threads, so spawn gluster directly: run_command fails
+    # through fail_json, which prints a result of its own from the thread
+    args = [ glusterbin, 'peer', 'probe', host ]
+    try:
+        cmd = subprocess.Popen(args, stdin=open(os.devnull), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = cmd.communicate()
+    except OSError, e:
+        errors[host] = 'error running gluster (%s) command: %s' % (' '.join(args), str(e))
+        return
+    if cmd.returncode != 0:
+        errors[host] = 'error running gluster (%s) command (rc=%d): %s' % (' '.join(args), cmd.returncode, out or err)
 
 def probe_all_peers(hosts, peers, myhostname):
+    global module
+    new_hosts = []
     for host in hosts:
         host = host.strip() # Clean up any extra space for exact comparison
-        if host not in peers:
-            # dont probe ourselves
-            if myhostname != host:
-                probe(host, myhostname)
+        # dont probe ourselves
+        if host not in peers and myhostname != host and host not in new_hosts:
+            new_hosts.append(host)
+    if not new_hosts:
+        return False
+
+    errors = {}
+    threads = []
+    for host in new_hosts:
+        thread = threading.Thread(target=probe, args=(host, errors))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    # concurrent probes may trip over the cluster lock, retry those one by one
+    for host in new_hosts:
+        if host in errors:
+            del errors[host]
+            probe(host, errors)
+    if errors:
+        module.fail_json(msg='failed to probe peers on %s: %s' % (myhostname, '; '.join(errors.values())))
+
+    failed = wait_for_peers(new_hosts)
+    if failed:
+        module.fail_json(msg='failed to probe peer %s on %s' % (', '.join(failed), myhostname))
+    return True
 
 def create_volume(name, stripe, replica, transport, hosts, bricks, force):
     args = [ 'volume', 'create' ]
@@ -286,11 +344,16 @@ def start_volume(name):
 def stop_volume(name):
     run_gluster_yes([ 'volume', 'stop', name ])
 
-def set_volume_option(name, option, parameter):
-    run_gluster([ 'volume', 'set', name, option, parameter ])
+def set_volume_options(name, options):
+    # volume set accepts several key/value pairs, apply them in one call
+    args = [ 'volume', 'set', name ]
+    for option in sorted(options.keys()):
+        args.extend([ option, options[option] ])
+    run_gluster(args)
 
-def add_brick(name, brick, force):
-    args = [ 'volume', 'add-brick', name, brick ]
+def add_bricks(name, bricks, force):
+    args = [ 'volume', 'add-brick', name ]
+    args.extend(bricks)
     if force:
         args.append('force')
     run_gluster(args)
@@ -363,32 +426,34 @@ def main():
     directory = module.params['directory']
 
 
-    # get current state info
-    peers = get_peers()
-    volumes = get_volumes()
+    # get current state info, shared by everything below
+    gluster = GlusterCluster()
     quotas = {}
-    if volume_name in volumes and volumes[volume_name]['quota'] and volumes[volume_name]['status'].lower() == 'started':
-        quotas = get_quotas(volume_name, True)
+    volume = gluster.volumes.get(volume_name)
+    if volume and volume['quota'] and volume['status'].lower() == 'started':
+        quotas = gluster.quotas(volume_name, True)
 
     # do the work!
     if action == 'absent':
-        if volume_name in volumes:
-            if volumes[volume_name]['status'].lower() != 'stopped':
+        if volume_name in gluster.volumes:
+            if gluster.volumes[volume_name]['status'].lower() != 'stopped':
                 stop_volume(volume_name)
             run_gluster_yes([ 'volume', 'delete', volume_name ])
             changed = True
 
     if action == 'present':
-        probe_all_peers(cluster, peers, myhostname)
+        if probe_all_peers(cluster, gluster.peers, myhostname):
+            gluster.refresh(volumes=False)
 
         # create if it doesn't exist
-        if volume_name not in volumes:
+        if volume_name not in gluster.volumes:
             create_volume(volume_name, stripes, replicas, transport, cluster, brick_paths, force)
-            volumes = get_volumes()
+            gluster.refresh(peers=False)
             changed = True
 
-        if volume_name in volumes:
-            if volumes[volume_name]['status'].lower() != 'started' and start_on_create:
+        if volume_name in gluster.volumes:
+            volume = gluster.volumes[volume_name]
+            if volume['status'].lower() != 'started' and start_on_create:
                 start_volume(volume_name)
                 changed = True
 
@@ -400,56 +465,59 @@ def main():
                 for brick_path in brick_paths:
                     brick = '%s:%s' % (node, brick_path)
                     all_bricks.append(brick)
-                    if brick not in volumes[volume_name]['bricks']:
+                    if brick not in volume['bricks']:
                         new_bricks.append(brick)
 
             # this module does not yet remove bricks, but we check those anyways
-            for brick in volumes[volume_name]['bricks']:
+            for brick in volume['bricks']:
                 if brick not in all_bricks:
                     removed_bricks.append(brick)
 
-            for brick in new_bricks:
-                add_brick(volume_name, brick, force)
+            if new_bricks:
+                add_bricks(volume_name, new_bricks, force)
                 changed = True
 
             # handle quotas
             if quota:
-                if not volumes[volume_name]['quota']:
+                if not volume['quota']:
                     enable_quota(volume_name)
-                quotas = get_quotas(volume_name, False)
+                quotas = gluster.quotas(volume_name)
                 if directory not in quotas or quotas[directory] != quota:
                     set_quota(volume_name, directory, quota)
                     changed = True
 
             # set options
+            changed_options = {}
             for option in options.keys():
-                if option not in volumes[volume_name]['options'] or volumes[volume_name]['options'][option] != options[option]:
-                    set_volume_option(volume_name, option, options[option])
-                    changed = True
+                if option not in volume['options'] or volume['options'][option] != options[option]:
+                    changed_options[option] = options[option]
+            if changed_options:
+                set_volume_options(volume_name, changed_options)
+                changed = True
 
         else:
             module.fail_json(msg='failed to create volume %s' % volume_name)
 
-    if volume_name not in volumes:
+    if volume_name not in gluster.volumes:
         module.fail_json(msg='volume not found %s' % volume_name)
 
     if action == 'started':
-        if volumes[volume_name]['status'].lower() != 'started':
+        if gluster.volumes[volume_name]['status'].lower() != 'started':
             start_volume(volume_name)
             changed = True
 
     if action == 'stopped':
-        if volumes[volume_name]['status'].lower() != 'stopped':
+        if gluster.volumes[volume_name]['status'].lower() != 'stopped':
             stop_volume(volume_name)
             changed = True
 
     if changed:
-        volumes = get_volumes()
+        gluster.refresh(peers=False)
         if rebalance:
             do_rebalance(volume_name)
 
     facts = {}
-    facts['glusterfs'] = { 'peers': peers, 'volumes': volumes, 'quotas': quotas }
+    facts['glusterfs'] = { 'peers': gluster.peers, 'volumes': gluster.volumes, 'quotas': quotas }
 
     module.exit_json(changed=changed, ansible_facts=facts)
 
@@ -20,6 +20,7 @@
 
 import os
 import re
+import tempfile
 
 
 DOCUMENTATION = '''
@@ -32,15 +33,32 @@ description:
     - Add or remove kernel modules from blacklist.
 options:
     name:
-        required: true
+        required: false
+        description:
+            - Name of kernel module to black- or whitelist, or a list of
+              names. Required unless C(modules) is given.
+    modules:
+        required: false
+        default: null
+        version_added: "2.1"
         description:
-            - Name of kernel module to black- or whitelist.
+            - A hash of module names and their state (C(present) or
+              C(absent)), for mixed changes in one run. The blacklist file
+              is read once and written at most once.
     state:
         required: false
         default: "present"
         choices: [ present, absent ]
         description:
             - Whether the module should be present in the blacklist or absent.
+    unload:
+        required: false
+        default: "no"
+        choices: [ "yes", "no" ]
+        version_added: "2.1"
+        description:
+            - Unload newly blacklisted modules that are currently loaded,
+              with a single C(modprobe -r) call.
     blacklist_file:
         required: false
         description:
@@ -53,86 +71,147 @@ requirements: []
 EXAMPLES = '''
 # Blacklist the nouveau driver module
 - kernel_blacklist: name=nouveau state=present
+
+# Blacklist several modules, unloading them right away
+- kernel_blacklist: name=pcspkr,floppy,joydev unload=yes
+
+# Mixed changes in one pass
+- kernel_blacklist:
+    modules:
+      nouveau: present
+      i915: absent
 '''
 
 
 class Blacklist(object):
-    def __init__(self, module, filename):
-        if not os.path.exists(filename):
-            open(filename, 'a').close()
-
-        self.filename = filename
-        self.module = module
+    """
+    Blacklist file read once, with the set of blacklisted module names;
+    changes are kept in memory until write().
+    """
 
-    def get_pattern(self):
-        return '^blacklist\s*' + self.module + '$'
+    pattern = re.compile(r'^blacklist\s*(\S+)$')
 
-    def readlines(self):
-        f = open(self.filename, 'r')
-        lines = f.readlines()
+    def __init__(self, filename):
+        self.filename = filename
+        self.lines = []
+        if os.path.exists(filename):
+            f = open(filename, 'r')
+            self.lines = f.readlines()
+            f.close()
+        self.names = set()
+        for line in self.lines:
+            name = self.listed_name(line)
+            if name:
+                self.names.add(name)
+        self.changed = False
+
+    def listed_name(self, line):
+        stripped = line.strip()
+        if stripped.startswith('#'):
+            return None
+        match = self.pattern.match(stripped)
+        if match:
+            return match.group(1)
+        return None
+
+    def module_listed(self, name):
+        return name in self.names
+
+    def remove_modules(self, names):
+        names = set(names)
+        self.lines = [line for line in self.lines if self.listed_name(line) not in names]
+        self.names -= names
+        self.changed = True
+
+    def add_modules(self, names):
+        if self.lines and not self.lines[-1].endswith('\n'):
+            self.lines[-1] += '\n'
+        for name in names:
+            self.lines.append('blacklist %s\n' % name)
+            self.names.add(name)
+        self.changed = True
+
+    def write(self, module):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.filename)))
+        f = os.fdopen(fd, 'w')
+        f.write(''.join(self.lines))
         f.close()
-        return lines
-
-    def module_listed(self):
-        lines = self.readlines()
-        pattern = self.get_pattern()
-
-        for line in lines:
-            stripped = line.strip()
-            if stripped.startswith('#'):
-                continue
-
-            if re.match(pattern, stripped):
-                return True
+        module.atomic_move(tmp, self.filename)
 
-        return False
 
-    def remove_module(self):
-        lines = self.readlines()
-        pattern = self.get_pattern()
-
-        f = open(self.filename, 'w')
-
-        for line in lines:
-            if not re.match(pattern, line.strip()):
-                f.write(line)
-
-        f.close()
-
-    def add_module(self):
-        f = open(self.filename, 'a')
-        f.write('blacklist %s\n' % self.module)
+def loaded_modules():
+    f = open('/proc/modules', 'r')
+    loaded = set([line.split(' ', 1)[0] for line in f if line.strip()])
+    f.close()
+    return loaded
 
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            name=dict(required=True),
+            name=dict(required=False, type='list'),
+            modules=dict(required=False, type='dict'),
             state=dict(required=False, choices=['present', 'absent'],
                        default='present'),
-            blacklist_file=dict(required=False, default=None)
+            blacklist_file=dict(required=False, default=None),
+            unload=dict(required=False, default=False, type='bool'),
         ),
-        supports_check_mode=False,
+        mutually_exclusive=[['name', 'modules']],
+        required_one_of=[['name', 'modules']],
+        supports_check_mode=True,
     )
 
-    args = dict(changed=False, failed=False,
-                name=module.params['name'], state=module.params['state'])
+    names = module.params['name']
+    state = module.params['state']
+    if module.params['modules'] is not None:
+        wanted = module.params['modules']
+        for name, mod_state in wanted.items():
+            if mod_state not in ['present', 'absent']:
+                module.fail_json(msg="state of module %s must be present or absent" % name)
+        names = sorted(wanted.keys())
+    else:
+        wanted = dict((name, state) for name in names)
+
+    args = dict(changed=False, failed=False, state=state)
+    if len(names) == 1:
+        args['name'] = names[0]
+    else:
+        args['name'] = names
 
     filename = '/etc/modprobe.d/blacklist-ansible.conf'
 
     if module.params['blacklist_file']:
         filename = module.params['blacklist_file']
 
-    blacklist = Blacklist(args['name'], filename)
+    blacklist = Blacklist(filename)
 
-    if blacklist.module_listed():
-        if args['state'] == 'absent':
-            blacklist.remove_module()
-            args['changed'] = True
-    else:
-        if args['state'] == 'present':
-            blacklist.add_module()
+    added = [name for name in names if wanted[name] == 'present' and not blacklist.module_listed(name)]
+    removed = [name for name in names if wanted[name] == 'absent' and blacklist.module_listed(name)]
+
+    if removed:
+        blacklist.remove_modules(removed)
+    if added:
+        blacklist.add_modules(added)
+
+    if blacklist.changed:
+        args['changed'] = True
+        args['added'] = added
+        args['removed'] = removed
+        if not module.check_mode:
+            blacklist.write(module)
+
+    if added and module.boolean(module.params['unload']):
+        # /proc/modules lists names with underscores
+        loaded = loaded_modules()
+        unload = [name for name in added if name.replace('-', '_') in loaded]
+        if unload:
             args['changed'] = True
+            args['unloaded'] = unload
+            if not module.check_mode:
+                modprobe = module.get_bin_path('modprobe', True)
+                rc, out, err = module.run_command([modprobe, '-r'] + unload)
+                if rc != 0:
+                    module.fail_json(msg=err, rc=rc, **args)
 
     module.exit_json(**args)
 
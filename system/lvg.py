@@ -89,22 +89,30 @@ def parse_vgs(data):
         })
     return vgs
 
-def find_mapper_device_name(module, dm_device):
-        dmsetup_cmd = module.get_bin_path('dmsetup', True)
-        mapper_prefix = '/dev/mapper/'
-        rc, dm_name, err = module.run_command("%s info -C --noheadings -o name %s" % (dmsetup_cmd, dm_device))
-        if rc != 0:
-            module.fail_json(msg="Failed executing dmsetup command.", rc=rc, err=err)
-        mapper_device = mapper_prefix + dm_name.rstrip()
-        return mapper_device
+def get_mapper_device_names(module):
+    # one dmsetup call resolves every /dev/dm-N node instead of one per device
+    dmsetup_cmd = module.get_bin_path('dmsetup', True)
+    mapper_prefix = '/dev/mapper/'
+    rc, out, err = module.run_command("%s info -C --noheadings -o blkdevname,name --separator ';'" % dmsetup_cmd)
+    if rc != 0:
+        module.fail_json(msg="Failed executing dmsetup command.", rc=rc, err=err)
+    names = {}
+    for line in out.splitlines():
+        parts = line.strip().split(';')
+        if len(parts) == 2:
+            names['/dev/' + parts[0]] = mapper_prefix + parts[1]
+    return names
 
 def parse_pvs(module, data):
     pvs = []
     dm_prefix = '/dev/dm-'
+    mapper_names = None
     for line in data.splitlines():
         parts = line.strip().split(';')
         if parts[0].startswith(dm_prefix):
-            parts[0] = find_mapper_device_name(module, parts[0])
+            if mapper_names is None:
+                mapper_names = get_mapper_device_names(module)
+            parts[0] = mapper_names.get(parts[0], parts[0])
         pvs.append({
             'name': parts[0],
             'vg_name': parts[1],
@@ -31,12 +31,14 @@ version_added: "1.1"
 options:
   vg:
     description:
-    - The volume group this logical volume is part of.
-    required: true
+    - The volume group this logical volume is part of. Required unless
+      C(volumes) is given, in which case it is the default volume group
+      for the listed volumes.
+    required: false
   lv:
     description:
-    - The name of the logical volume.
-    required: true
+    - The name of the logical volume. Required unless C(volumes) is given.
+    required: false
   size:
     description:
     - The size of the logical volume, according to lvcreate(8) --size, by
@@ -61,6 +63,17 @@ options:
     version_added: "2.0"
     description:
     - Free-form options to be passed to the lvcreate command
+  volumes:
+    version_added: "2.1"
+    description:
+    - List of logical volumes to converge in one run. Each item is a hash
+      with the keys C(lv), C(vg), C(size), C(opts), C(state) and C(force),
+      which default to the module level C(vg), C(state) and C(force).
+    - Current volumes are read with a single C(vgs) and C(lvs) scan and a
+      per volume report is returned in C(volumes).
+    - Mutually exclusive with C(lv).
+    required: false
+    default: null
 notes:
   - Filesystems on top of the volume are not resized.
 '''
@@ -86,6 +99,15 @@ EXAMPLES = '''
 
 # Remove the logical volume.
 - lvol: vg=firefly lv=test state=absent force=yes
+
+# Converge several logical volumes at once
+- lvol:
+    vg: firefly
+    volumes:
+      - { lv: data, size: 100g }
+      - { lv: wal, size: 16g, opts: "-i 2" }
+      - { lv: backup, vg: archive, size: 100%FREE }
+      - { lv: scratch, state: absent, force: yes }
 '''
 
 import re
@@ -106,6 +128,45 @@ def parse_lvs(data):
     return lvs
 
 
+def parse_size(module, size):
+    size_opt = 'L'
+    size_unit = 'm'
+    if not size:
+        return size, size_opt, size_unit
+
+    # LVCREATE(8) -l --extents option with percentage
+    if '%' in size:
+        size_parts = size.split('%', 1)
+        size_percent = int(size_parts[0])
+        if size_percent > 100:
+            module.fail_json(msg="Size percentage cannot be larger than 100%")
+        size_whole = size_parts[1]
+        if size_whole == 'ORIGIN':
+            module.fail_json(msg="Snapshot Volumes are not supported")
+        elif size_whole not in ['VG', 'PVS', 'FREE']:
+            module.fail_json(msg="Specify extents as a percentage of VG|PVS|FREE")
+        size_opt = 'l'
+        size_unit = ''
+
+    # LVCREATE(8) -L --size option unit
+    elif size[-1].isalpha():
+        if size[-1].lower() in 'bskmgtpe':
+            size_unit = size[-1].lower()
+            if size[0:-1].isdigit():
+                size = int(size[0:-1])
+            else:
+                module.fail_json(msg="Bad size specification for unit %s" % size_unit)
+            size_opt = 'L'
+        else:
+            module.fail_json(msg="Size unit should be one of [bBsSkKmMgGtTpPeE]")
+    # when no unit, megabytes by default
+    elif size.isdigit():
+        size = int(size)
+    else:
+        module.fail_json(msg="Bad size specification")
+    return size, size_opt, size_unit
+
+
 def get_lvm_version(module):
     ver_cmd = module.get_bin_path("lvm", required=True)
     rc, out, err = module.run_command("%s version" % (ver_cmd))
@@ -117,16 +178,161 @@ def get_lvm_version(module):
     return mkversion(m.group(1), m.group(2), m.group(3))
 
 
+unit_factors = dict(b=1, s=512, k=1024 ** 1, m=1024 ** 2, g=1024 ** 3,
+                    t=1024 ** 4, p=1024 ** 5, e=1024 ** 6)
+
+def scan_volumes(module, vg_names):
+    """
+    Read every volume group and the logical volumes of the requested ones
+    with one vgs and one lvs call, sizes in bytes.
+    """
+    vgs_cmd = module.get_bin_path("vgs", required=True)
+    rc, out, err = module.run_command(
+        "%s --noheadings --nosuffix --units b -o vg_name,vg_size,vg_free,vg_extent_size --separator ';'" % vgs_cmd)
+    if rc != 0:
+        module.fail_json(msg="Failed executing vgs command.", rc=rc, err=err)
+    vgs = {}
+    for line in out.splitlines():
+        parts = line.strip().split(';')
+        if len(parts) < 4:
+            continue
+        vgs[parts[0]] = {
+            'size': int(decimal_point.split(parts[1])[0]),
+            'free': int(decimal_point.split(parts[2])[0]),
+            'extent_size': int(decimal_point.split(parts[3])[0]),
+        }
+
+    lvs = {}
+    existing = [ name for name in vg_names if name in vgs ]
+    if existing:
+        lvs_cmd = module.get_bin_path("lvs", required=True)
+        rc, out, err = module.run_command(
+            "%s --noheadings --nosuffix --units b -o vg_name,lv_name,size --separator ';' %s" % (lvs_cmd, ' '.join(existing)))
+        if rc != 0:
+            module.fail_json(msg="Failed executing lvs command.", rc=rc, err=err)
+        for line in out.splitlines():
+            parts = line.strip().split(';')
+            if len(parts) < 3:
+                continue
+            lvs[(parts[0], parts[1])] = int(decimal_point.split(parts[2])[0])
+    return vgs, lvs
+
+
+def converge_volumes(module, yesopt):
+    default_vg = module.params['vg']
+    default_state = module.params['state']
+    default_force = module.boolean(module.params['force'])
+
+    wanted = []
+    for item in module.params['volumes']:
+        if not isinstance(item, dict) or not item.get('lv'):
+            module.fail_json(msg="Each item in volumes needs at least an lv key: %s" % item)
+        vol = {
+            'lv': item['lv'],
+            'vg': item.get('vg', default_vg),
+            'state': item.get('state', default_state),
+            'force': module.boolean(item.get('force', default_force)),
+            'opts': item.get('opts') or '',
+        }
+        if not vol['vg']:
+            module.fail_json(msg="No volume group given for logical volume %s" % vol['lv'])
+        if vol['state'] not in ['present', 'absent']:
+            module.fail_json(msg="Invalid state %s for logical volume %s" % (vol['state'], vol['lv']))
+        size = item.get('size')
+        if size is not None:
+            size = str(size)
+        vol['size'], vol['size_opt'], vol['size_unit'] = parse_size(module, size)
+        wanted.append(vol)
+
+    vg_names = []
+    for vol in wanted:
+        if vol['vg'] not in vg_names:
+            vg_names.append(vol['vg'])
+    vgs, lvs = scan_volumes(module, vg_names)
+
+    report = []
+    to_remove = []
+    for vol in wanted:
+        key = (vol['vg'], vol['lv'])
+        current = lvs.get(key)
+        result = dict(vg=vol['vg'], lv=vol['lv'], state=vol['state'], changed=False, action=None)
+        if current is not None:
+            result['size'] = current // unit_factors['m']
+        report.append(result)
+
+        if vol['state'] == 'absent':
+            if current is None:
+                continue
+            if not vol['force']:
+                module.fail_json(msg="Sorry, no removal of logical volume %s without force=yes." % vol['lv'])
+            to_remove.append('%s/%s' % key)
+            result.update(changed=True, action='remove')
+            continue
+
+        if vol['vg'] not in vgs:
+            module.fail_json(msg="Volume group %s does not exist." % vol['vg'])
+
+        if current is None:
+            if not vol['size']:
+                module.fail_json(msg="No size given for logical volume %s." % vol['lv'])
+            result.update(changed=True, action='create')
+            if not module.check_mode:
+                lvcreate_cmd = module.get_bin_path("lvcreate", required=True)
+                cmd = "%s %s -n %s -%s %s%s %s %s" % (lvcreate_cmd, yesopt, vol['lv'], vol['size_opt'],
+                                                      vol['size'], vol['size_unit'], vol['opts'], vol['vg'])
+                rc, _, err = module.run_command(cmd)
+                if rc != 0:
+                    module.fail_json(msg="Creating logical volume '%s' failed" % vol['lv'], rc=rc, err=err, volumes=report)
+            continue
+
+        if not vol['size'] or vol['size_opt'] == 'l':
+            continue
+
+        # lvm rounds sizes up to whole extents, compare against that
+        extent_size = vgs[vol['vg']]['extent_size']
+        wanted_size = vol['size'] * unit_factors[vol['size_unit']]
+        if extent_size:
+            wanted_size = -(-wanted_size // extent_size) * extent_size
+        if wanted_size == current:
+            continue
+        if wanted_size > current:
+            tool = module.get_bin_path("lvextend", required=True)
+            result['action'] = 'extend'
+        else:
+            if not vol['force']:
+                module.fail_json(msg="Sorry, no shrinking of %s without force=yes." % vol['lv'])
+            tool = '%s --force' % module.get_bin_path("lvreduce", required=True)
+            result['action'] = 'reduce'
+        result['changed'] = True
+        if not module.check_mode:
+            rc, _, err = module.run_command("%s -%s %s%s %s/%s" % (tool, vol['size_opt'], vol['size'],
+                                                                  vol['size_unit'], vol['vg'], vol['lv']))
+            if rc != 0:
+                module.fail_json(msg="Unable to resize %s to %s%s" % (vol['lv'], vol['size'], vol['size_unit']),
+                                 rc=rc, err=err, volumes=report)
+
+    if to_remove and not module.check_mode:
+        lvremove_cmd = module.get_bin_path("lvremove", required=True)
+        rc, _, err = module.run_command("%s --force %s" % (lvremove_cmd, ' '.join(to_remove)))
+        if rc != 0:
+            module.fail_json(msg="Failed to remove logical volumes %s" % ', '.join(to_remove), rc=rc, err=err, volumes=report)
+
+    changed = any([ result['changed'] for result in report ])
+    module.exit_json(changed=changed, volumes=report)
+
+
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            vg=dict(required=True),
-            lv=dict(required=True),
+            vg=dict(),
+            lv=dict(),
             size=dict(),
             opts=dict(type='str'),
             state=dict(choices=["absent", "present"], default='present'),
             force=dict(type='bool', default='no'),
+            volumes=dict(type='list'),
         ),
+        mutually_exclusive=[['lv', 'volumes']],
         supports_check_mode=True,
     )
 
@@ -140,49 +346,23 @@ def main():
     else:
         yesopt = ""
 
+    if module.params['volumes'] is not None:
+        converge_volumes(module, yesopt)
+
+    if not module.params['vg'] or not module.params['lv']:
+        module.fail_json(msg="vg and lv are required unless volumes is given")
+
     vg = module.params['vg']
     lv = module.params['lv']
     size = module.params['size']
     opts = module.params['opts']
     state = module.params['state']
     force = module.boolean(module.params['force'])
-    size_opt = 'L'
-    size_unit = 'm'
 
     if opts is None:
         opts = ""
 
-    if size:
-        # LVCREATE(8) -l --extents option with percentage
-        if '%' in size:
-            size_parts = size.split('%', 1)
-            size_percent = int(size_parts[0])
-            if size_percent > 100:
-                module.fail_json(msg="Size percentage cannot be larger than 100%")
-            size_whole = size_parts[1]
-            if size_whole == 'ORIGIN':
-                module.fail_json(msg="Snapshot Volumes are not supported")
-            elif size_whole not in ['VG', 'PVS', 'FREE']:
-                module.fail_json(msg="Specify extents as a percentage of VG|PVS|FREE")
-            size_opt = 'l'
-            size_unit = ''
-
-        # LVCREATE(8) -L --size option unit
-        elif size[-1].isalpha():
-            if size[-1].lower() in 'bskmgtpe':
-                size_unit = size[-1].lower()
-                if size[0:-1].isdigit():
-                    size = int(size[0:-1])
-                else:
-                    module.fail_json(msg="Bad size specification for unit %s" % size_unit)
-                size_opt = 'L'
-            else:
-                module.fail_json(msg="Size unit should be one of [bBsSkKmMgGtTpPeE]")
-        # when no unit, megabytes by default
-        elif size.isdigit():
-            size = int(size)
-        else:
-            module.fail_json(msg="Bad size specification")
+    size, size_opt, size_unit = parse_size(module, size)
 
     if size_opt == 'l':
         unit = 'm'
@@ -45,6 +45,20 @@ options:
         aliases: [name, targetname]
         description:
         - the iscsi target name
+    targets:
+        required: false
+        version_added: "2.1"
+        description:
+        - list of iscsi target names to handle in one run, mutually exclusive
+          with target. Sessions are listed once, logins and logouts run in
+          parallel and device nodes are awaited for all targets together.
+    device_timeout:
+        required: false
+        default: 10
+        version_added: "2.1"
+        description:
+        - seconds to wait for the device nodes of newly logged in targets
+          when using targets
     login:
         required: false
         choices: [true, false]
@@ -98,12 +112,18 @@ examples:
                    persistent database (cache)
       code: >
         open_iscsi: login=yes target=iqn.1986-03.com.sun:02:f8c1f9e0-c3ec-ec84-c9c9-8bfb0cd5de3d
+    - description: discover the portal once and connect to several targets in parallel
+      code: >
+        open_iscsi: portal=10.1.2.3 discover=yes login=yes targets=iqn.2001-05.com.example:lun1,iqn.2001-05.com.example:lun2
     - description: discconnect from the cached named target
       code: >
         open_iscsi: login=no target=iqn.1986-03.com.sun:02:f8c1f9e0-c3ec-ec84-c9c9-8bfb0cd5de3d"
 '''
 
 import glob
+import shlex
+import subprocess
+import threading
 import time
 
 ISCSIADM = 'iscsiadm'
@@ -116,25 +136,30 @@ def compare_nodelists(l1, l2):
     return l1 == l2
 
 
+def iscsi_parse_nodes(module, cmd, out, portal=None):
+
+    nodes = []
+    for line in out.splitlines():
+        # line format is "ip:port,target_portal_group_tag targetname"
+        parts = line.split()
+        if len(parts) > 2:
+            module.fail_json(msg='error parsing output', cmd=cmd)
+        target = parts[1]
+        parts = parts[0].split(':')
+        target_portal = parts[0]
+
+        if portal is None or portal == target_portal:
+            nodes.append(target)
+    return nodes
+
+
 def iscsi_get_cached_nodes(module, portal=None):
 
     cmd = '%s --mode node' % iscsiadm_cmd
     (rc, out, err) = module.run_command(cmd)
 
     if rc == 0:
-        lines = out.splitlines()
-        nodes = []
-        for line in lines:
-            # line format is "ip:port,target_portal_group_tag targetname"
-            parts = line.split()
-            if len(parts) > 2:
-                module.fail_json(msg='error parsing output', cmd=cmd)
-            target = parts[1]
-            parts = parts[0].split(':')
-            target_portal = parts[0]
-
-            if portal is None or portal == target_portal:
-                nodes.append(target)
+        nodes = iscsi_parse_nodes(module, cmd, out, portal)
 
     # older versions of scsiadm don't have nice return codes
     # for newer versions see iscsiadm(8); also usr/iscsiadm.c for details
@@ -155,6 +180,9 @@ def iscsi_discover(module, portal, port):
     if rc > 0:
         module.fail_json(cmd=cmd, rc=rc, msg=err)
 
+    # discovery prints the node records it wrote, no need to list them again
+    return iscsi_parse_nodes(module, cmd, out, portal)
+
 
 def target_loggedon(module, target):
 
@@ -169,53 +197,132 @@ def target_loggedon(module, target):
         module.fail_json(cmd=cmd, rc=rc, msg=err)
 
 
-def target_login(module, target):
+def target_login_cmds(module, target):
 
     node_auth = module.params['node_auth']
     node_user = module.params['node_user']
     node_pass = module.params['node_pass']
 
+    cmds = []
     if node_user:
         params = [('node.session.auth.authmethod', node_auth),
                   ('node.session.auth.username', node_user),
                   ('node.session.auth.password', node_pass)]
         for (name, value) in params:
-            cmd = '%s --mode node --targetname %s --op=update --name %s --value %s' % (iscsiadm_cmd, target, name, value)
-            (rc, out, err) = module.run_command(cmd)
-            if rc > 0:
-                module.fail_json(cmd=cmd, rc=rc, msg=err)
+            cmds.append('%s --mode node --targetname %s --op=update --name %s --value %s' % (iscsiadm_cmd, target, name, value))
 
-    cmd = '%s --mode node --targetname %s --login' % (iscsiadm_cmd, target)
-    (rc, out, err) = module.run_command(cmd)
+    cmds.append('%s --mode node --targetname %s --login' % (iscsiadm_cmd, target))
+    return cmds
 
-    if rc > 0:
-        module.fail_json(cmd=cmd, rc=rc, msg=err)
+
+def target_logout_cmds(module, target):
+
+    return ['%s --mode node --targetname %s --logout' % (iscsiadm_cmd, target)]
+
+
+def target_login(module, target):
+
+    for cmd in target_login_cmds(module, target):
+        (rc, out, err) = module.run_command(cmd)
+        if rc > 0:
+            module.fail_json(cmd=cmd, rc=rc, msg=err)
 
 
 def target_logout(module, target):
 
-    cmd = '%s --mode node --targetname %s --logout' % (iscsiadm_cmd, target)
+    for cmd in target_logout_cmds(module, target):
+        (rc, out, err) = module.run_command(cmd)
+        if rc > 0:
+            module.fail_json(cmd=cmd, rc=rc, msg=err)
+
+
+def targets_run_parallel(module, target_cmds):
+
+    # a login blocks until the session is established, so run the command
+    # sequence of every target in its own thread and report failures after.
+    # The threads spawn iscsiadm directly: run_command fails through
+    # fail_json, which prints a result of its own from the thread.
+    errors = {}
+
+    def run(target, cmds):
+        for cmd in cmds:
+            try:
+                proc = subprocess.Popen(shlex.split(cmd), stdin=open(os.devnull),
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                (out, err) = proc.communicate()
+                rc = proc.returncode
+            except OSError, e:
+                (rc, err) = (1, str(e))
+            if rc != 0:
+                errors[target] = dict(cmd=cmd, rc=rc, msg=err)
+                return
+
+    threads = []
+    for (target, cmds) in target_cmds.items():
+        thread = threading.Thread(target=run, args=(target, cmds))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        module.fail_json(msg='iscsiadm failed for %s' % ', '.join(sorted(errors.keys())), errors=errors)
+
+
+def targets_loggedon(module, targets):
+
+    cmd = '%s --mode session' % iscsiadm_cmd
     (rc, out, err) = module.run_command(cmd)
 
-    if rc > 0:
+    if rc == 0:
+        sessions = []
+        for line in out.splitlines():
+            # line format is "tcp: [sid] ip:port,target_portal_group_tag targetname"
+            parts = line.split()
+            if len(parts) > 3:
+                sessions.append(parts[3])
+        return [target for target in targets if target in sessions]
+    elif rc == 21:
+        return []
+    else:
         module.fail_json(cmd=cmd, rc=rc, msg=err)
 
 
+def targets_device_nodes(module, targets):
+
+    # one listing of /dev/disk/by-path serves every target
+    devices = glob.glob('/dev/disk/by-path/*')
+    nodes = {}
+    for target in targets:
+        devdisks = []
+        for dev in devices:
+            # exclude partitions
+            if target in dev and "-part" not in dev:
+                devdisk = os.path.realpath(dev)
+                # only add once (multi-path?)
+                if devdisk not in devdisks:
+                    devdisks.append(devdisk)
+        nodes[target] = devdisks
+    return nodes
+
+
+def targets_wait_device_nodes(module, targets, timeout):
+
+    deadline = time.time() + timeout
+    while True:
+        nodes = targets_device_nodes(module, targets)
+        missing = [target for target in targets if not nodes[target]]
+        if not missing or time.time() >= deadline:
+            return nodes
+        time.sleep(0.5)
+
+
 def target_device_node(module, target):
 
     # if anyone know a better way to find out which devicenodes get created for
     # a given target...
 
-    devices = glob.glob('/dev/disk/by-path/*%s*' % target)
-    devdisks = []
-    for dev in devices:
-        # exclude partitions
-        if "-part" not in dev:
-            devdisk = os.path.realpath(dev)
-            # only add once (multi-path?)
-            if devdisk not in devdisks:
-                devdisks.append(devdisk)
-    return devdisks
+    return targets_device_nodes(module, [target])[target]
 
 
 def target_isauto(module, target):
@@ -251,6 +358,50 @@ def target_setmanual(module, target):
         module.fail_json(cmd=cmd, rc=rc, msg=err)
 
 
+def manage_targets(module, targets, login, automatic, result):
+
+    check = module.check_mode
+
+    if login is not None:
+        loggedon = targets_loggedon(module, targets)
+        if login:
+            todo = [t for t in targets if t not in loggedon]
+        else:
+            todo = [t for t in targets if t in loggedon]
+        if todo:
+            result['changed'] |= True
+            result['connection_changed'] = True
+            result['targets_changed'] = todo
+            if not check:
+                target_cmds = {}
+                for target in todo:
+                    if login:
+                        target_cmds[target] = target_login_cmds(module, target)
+                    else:
+                        target_cmds[target] = target_logout_cmds(module, target)
+                targets_run_parallel(module, target_cmds)
+        if login:
+            if todo and not check:
+                # give udev some time, for all new sessions at once
+                result['devicenodes'] = targets_wait_device_nodes(module, targets, module.params['device_timeout'])
+            else:
+                result['devicenodes'] = targets_device_nodes(module, targets)
+
+    if automatic is not None:
+        result['automatic_changed'] = False
+        for target in targets:
+            isauto = target_isauto(module, target)
+            if (automatic and isauto) or (not automatic and not isauto):
+                continue
+            if not check:
+                if automatic:
+                    target_setauto(module, target)
+                else:
+                    target_setmanual(module, target)
+            result['changed'] |= True
+            result['automatic_changed'] = True
+
+
 def main():
 
     # load ansible module object
@@ -261,6 +412,8 @@ def main():
             portal = dict(required=False, aliases=['ip']),
             port = dict(required=False, default=3260),
             target = dict(required=False, aliases=['name', 'targetname']),
+            targets = dict(required=False, type='list'),
+            device_timeout = dict(required=False, type='int', default=10),
             node_auth = dict(required=False, default='CHAP'),
             node_user = dict(required=False),
             node_pass = dict(required=False),
@@ -274,6 +427,7 @@ def main():
 
         required_together=[['discover_user', 'discover_pass'],
                            ['node_user', 'node_pass']],
+        mutually_exclusive=[['target', 'targets']],
         supports_check_mode=True
     )
 
@@ -283,6 +437,7 @@ def main():
     # parameters
     portal = module.params['portal']
     target = module.params['target']
+    targets = module.params['targets']
     port = module.params['port']
     login = module.params['login']
     automatic = module.params['auto_node_startup']
@@ -303,14 +458,22 @@ def main():
         elif check:
             nodes = cached
         else:
-            iscsi_discover(module, portal, port)
-            nodes = iscsi_get_cached_nodes(module, portal)
+            nodes = iscsi_discover(module, portal, port)
         if not compare_nodelists(cached, nodes):
             result['changed'] |= True
             result['cache_updated'] = True
     else:
         nodes = cached
 
+    if targets:
+        missing = [t for t in targets if t not in nodes]
+        if missing:
+            module.fail_json(msg = "Specified targets not found: %s" % ', '.join(missing))
+        if show_nodes:
+            result['nodes'] = nodes
+        manage_targets(module, targets, login, automatic, result)
+        module.exit_json(**result)
+
     if login is not None or automatic is not None:
         if target is None:
             if len(nodes) > 1:
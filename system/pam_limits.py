@@ -22,6 +22,7 @@ import os
 import os.path
 import shutil
 import re
+import tempfile
 
 DOCUMENTATION = '''
 ---
@@ -35,21 +36,35 @@ options:
   domain:
     description:
       - A username, @groupname, wildcard, uid/gid range.
-    required: true
+        Required unless C(limits) is given.
+    required: false
   limit_type:
     description:
-      - Limit type, see C(man limits) for an explanation
-    required: true
-    choices: [ "hard", "soft" ]
+      - Limit type, see C(man limits) for an explanation.
+        Required unless C(limits) is given.
+    required: false
+    choices: [ "hard", "soft", "-" ]
   limit_item:
     description:
-      - The limit to be set
-    required: true
+      - The limit to be set. Required unless C(limits) is given.
+    required: false
     choices: [ "core", "data", "fsize", "memlock", "nofile", "rss", "stack", "cpu", "nproc", "as", "maxlogins", "maxsyslogins", "priority", "locks", "sigpending", "msgqueue", "nice", "rtprio", "chroot" ]
   value:
     description:
-      - The value of the limit.
-    required: true
+      - The value of the limit, an integer or C(unlimited)/C(infinity).
+        Required unless C(limits) is given.
+    required: false
+  limits:
+    description:
+      - A list of limits to set in one pass. Each item is a hash with the
+        keys C(domain), C(limit_type), C(limit_item), C(value) and
+        optionally C(use_min), C(use_max) and C(comment); C(value) takes the
+        same values as the I(value) option.
+      - The file is parsed once, all limits are applied and it is written
+        at most once.
+    required: false
+    default: null
+    version_added: "2.1"
   backup:
     description:
       - Create a backup file including the timestamp information so you can get
@@ -78,6 +93,19 @@ options:
       - Modify the limits.conf path.
     required: false
     default: "/etc/security/limits.conf"
+  create:
+    description:
+      - Create C(dest) if it does not exist, e.g. for a drop-in file in
+        C(/etc/security/limits.d).
+    required: false
+    choices: [ "yes", "no" ]
+    default: "no"
+    version_added: "2.1"
+  comment:
+    description:
+      - Comment associated with the limit.
+    required: false
+    default: ''
 '''
 
 EXAMPLES = '''
@@ -86,8 +114,118 @@ EXAMPLES = '''
 
 # Add or modify limits for the user joe. Keep or set the maximal value
 - pam_limits: domain=joe limit_type=soft limit_item=nofile value=1000000
+
+# Set several limits for the database user in a limits.d drop-in
+- pam_limits:
+    dest: /etc/security/limits.d/90-postgres.conf
+    create: yes
+    limits:
+      - { domain: postgres, limit_type: soft, limit_item: nofile, value: 65536 }
+      - { domain: postgres, limit_type: hard, limit_item: nofile, value: 65536 }
+      - { domain: postgres, limit_type: '-', limit_item: memlock, value: unlimited }
 '''
 
+class PamLimits(object):
+    """
+    limits.conf parsed once into its lines plus an index of the lines
+    holding each (domain, type, item), so any number of limits can be
+    applied before the file is written back a single time.
+    """
+
+    space_pattern = re.compile(r'\s+')
+
+    def __init__(self, path):
+        self.path = path
+        self.lines = []
+        self.index = {}
+        self.changed = False
+        if os.path.exists(path):
+            f = open(path, 'r')
+            try:
+                for line in f:
+                    self._add_line(line)
+            finally:
+                f.close()
+
+    def _parse(self, line):
+        if line.startswith('#'):
+            return None
+        newline = re.sub(self.space_pattern, ' ', line).strip()
+        # Remove comment in line
+        newline = newline.split('#', 1)[0].rstrip()
+        fields = newline.split(' ')
+        if len(fields) != 4:
+            return None
+        return fields
+
+    def _add_line(self, line):
+        fields = self._parse(line)
+        if fields:
+            key = tuple(fields[:3])
+            self.index.setdefault(key, []).append(len(self.lines))
+        self.lines.append(line)
+
+    def set(self, domain, limit_type, limit_item, value, use_max=False, use_min=False, comment=''):
+        """Apply one limit, return the resulting line."""
+        value = str(value)
+        key = (domain, limit_type, limit_item)
+        if key not in self.index:
+            if comment:
+                comment = "\t#" + comment
+            new_limit = domain + "\t" + limit_type + "\t" + limit_item + "\t" + value + comment + "\n"
+            if self.lines and not self.lines[-1].endswith('\n'):
+                self.lines[-1] += '\n'
+            self._add_line(new_limit)
+            self.changed = True
+            return new_limit
+
+        message = ''
+        for lineno in self.index[key]:
+            line = self.lines[lineno]
+            actual_value = self._parse(line)[3]
+            new_value = value
+            if use_max:
+                new_value = self._pick(max, value, actual_value)
+            if use_min:
+                new_value = self._pick(min, value, actual_value)
+
+            # Change line only if value has changed
+            if new_value == actual_value:
+                message = line
+                continue
+            line_comment = comment
+            if not line_comment and '#' in line:
+                line_comment = line.split('#', 1)[1].rstrip('\n')
+            if line_comment:
+                line_comment = "\t#" + line_comment
+            new_limit = domain + "\t" + limit_type + "\t" + limit_item + "\t" + new_value + line_comment + "\n"
+            self.lines[lineno] = new_limit
+            self.changed = True
+            message = new_limit
+        return message
+
+    def _pick(self, choose, value, actual_value):
+        def weight(v):
+            if v in ('unlimited', 'infinity'):
+                return float('inf')
+            return int(v)
+        try:
+            if choose(weight(value), weight(actual_value)) == weight(actual_value):
+                return actual_value
+        except ValueError:
+            pass
+        return value
+
+    def write(self, module):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        f = os.fdopen(fd, 'w')
+        try:
+            f.write(''.join(self.lines))
+        finally:
+            f.close()
+        module.atomic_move(tmp, self.path)
+
+
 def main():
 
     pam_items = [ 'core', 'data', 'fsize', 'memlock', 'nofile', 'rss', 'stack', 'cpu', 'nproc', 'as', 'maxlogins', 'maxsyslogins', 'priority', 'locks', 'sigpending', 'msgqueue', 'nice', 'rtprio', 'chroot' ]
@@ -99,134 +237,82 @@ def main():
     module = AnsibleModule(
         # not checking because of daisy chain to file module
         argument_spec = dict(
-            domain            = dict(required=True, type='str'),
-            limit_type        = dict(required=True, type='str', choices=pam_types),
-            limit_item        = dict(required=True, type='str', choices=pam_items),
-            value             = dict(required=True, type='int'),
+            domain            = dict(required=False, type='str'),
+            limit_type        = dict(required=False, type='str', choices=pam_types),
+            limit_item        = dict(required=False, type='str', choices=pam_items),
+            value             = dict(required=False, type='str'),
+            limits            = dict(required=False, type='list'),
             use_max           = dict(default=False, type='bool'),
             use_min           = dict(default=False, type='bool'),
             backup            = dict(default=False, type='bool'),
             dest              = dict(default=limits_conf, type='str'),
+            create            = dict(default=False, type='bool'),
             comment           = dict(required=False, default='', type='str')
-        )
+        ),
+        mutually_exclusive = [ ['limits', 'domain'] ],
+        supports_check_mode = True
     )
 
-    domain      =       module.params['domain']
-    limit_type  =       module.params['limit_type']
-    limit_item  =       module.params['limit_item']
-    value       =       module.params['value']
+    limits      =       module.params['limits']
     use_max     =       module.params['use_max']
     use_min     =       module.params['use_min']
     backup      =       module.params['backup']
     limits_conf =       module.params['dest']
-    new_comment =       module.params['comment']
+    create      =       module.params['create']
 
-    changed = False
+    if limits is None:
+        for param in ['domain', 'limit_type', 'limit_item', 'value']:
+            if module.params[param] is None:
+                module.fail_json(msg="%s is required unless limits is given" % param)
+        limits = [ dict(domain=module.params['domain'], limit_type=module.params['limit_type'],
+                        limit_item=module.params['limit_item'], value=module.params['value'],
+                        use_max=use_max, use_min=use_min, comment=module.params['comment']) ]
 
     if os.path.isfile(limits_conf):
         if not os.access(limits_conf, os.W_OK):
             module.fail_json(msg="%s is not writable. Use sudo" % (limits_conf) )
-    else:
+    elif not create or not os.path.isdir(os.path.dirname(os.path.abspath(limits_conf))):
         module.fail_json(msg="%s is not visible (check presence, access rights, use sudo)" % (limits_conf) )
 
-    if use_max and use_min:
-        module.fail_json(msg="Cannot use use_min and use_max at the same time." )
-
-    # Backup
-    if backup:
-        backup_file = module.backup_local(limits_conf)
-
-    space_pattern = re.compile(r'\s+')
-
-    message = ''
-    f = open (limits_conf, 'r')
-    # Tempfile
-    nf = tempfile.NamedTemporaryFile(delete = False)
-
-    found = False
-    new_value = value
-
-    for line in f:
-
-        if line.startswith('#'):
-            nf.write(line)
-            continue
-
-        newline = re.sub(space_pattern, ' ', line).strip()
-        if not newline:
-            nf.write(line)
-            continue
-
-        # Remove comment in line
-        newline = newline.split('#',1)[0]
-        try:
-            old_comment = line.split('#',1)[1]
-        except:
-            old_comment = ''
-
-        newline = newline.rstrip()
-
-        if not new_comment:
-            new_comment = old_comment
-
-        if new_comment:
-            new_comment = "\t#"+new_comment
-
-        line_fields = newline.split(' ')
-
-        if len(line_fields) != 4:
-            nf.write(line)
-            continue
-
-        line_domain     = line_fields[0]
-        line_type       = line_fields[1]
-        line_item       = line_fields[2]
-        actual_value    = int(line_fields[3])
-
-        # Found the line
-        if line_domain == domain and line_type == limit_type and line_item == limit_item:
-            found = True
-            if value == actual_value:
-                message = line
-                nf.write(line)
-                continue
-
-            if use_max:
-                new_value = max(value, actual_value)
-
-            if use_min:
-                new_value = min(value,actual_value)
-
-            # Change line only if value has changed
-            if new_value != actual_value:
-                changed = True
-                new_limit = domain + "\t" + limit_type + "\t" + limit_item + "\t" + str(new_value) + new_comment + "\n"
-                message = new_limit
-                nf.write(new_limit)
-            else:
-                message = line
-                nf.write(line)
-        else:
-            nf.write(line)
-
-    if not found:
-        changed = True
-        new_limit = domain + "\t" + limit_type + "\t" + limit_item + "\t" + str(new_value) + new_comment + "\n"
-        message = new_limit
-        nf.write(new_limit)
-
-    f.close()
-    nf.close()
-
-    # Copy tempfile to newfile
-    module.atomic_move(nf.name, f.name)
-
-    res_args = dict(
-        changed = changed, msg = message
-    )
+    entries = []
+    for limit in limits:
+        if not isinstance(limit, dict):
+            module.fail_json(msg="Each item in limits must be a hash: %s" % limit)
+        entry = dict(use_max=use_max, use_min=use_min, comment='')
+        entry.update(limit)
+        for param in ['domain', 'limit_type', 'limit_item', 'value']:
+            if entry.get(param) is None:
+                module.fail_json(msg="%s is missing in limit %s" % (param, limit))
+        if entry['limit_type'] not in pam_types:
+            module.fail_json(msg="limit_type must be one of %s: %s" % (', '.join(pam_types), limit))
+        if entry['limit_item'] not in pam_items:
+            module.fail_json(msg="limit_item must be one of %s: %s" % (', '.join(pam_items), limit))
+        entry['use_max'] = module.boolean(entry['use_max'])
+        entry['use_min'] = module.boolean(entry['use_min'])
+        if entry['use_max'] and entry['use_min']:
+            module.fail_json(msg="Cannot use use_min and use_max at the same time." )
+        entry['value'] = str(entry['value']).strip()
+        if entry['value'] not in ('unlimited', 'infinity') and not re.match(r'^-?\d+$', entry['value']):
+            module.fail_json(msg="value must be an integer, unlimited or infinity: %s" % entry['value'])
+        entries.append(entry)
+
+    pam_limits = PamLimits(limits_conf)
+    messages = []
+    for entry in entries:
+        messages.append(pam_limits.set(entry['domain'], entry['limit_type'], entry['limit_item'], entry['value'],
+                                       entry['use_max'], entry['use_min'], entry['comment'] or ''))
+
+    res_args = dict(changed = pam_limits.changed)
+    if module.params['limits'] is None:
+        res_args['msg'] = messages[0]
+    else:
+        res_args['msg'] = ''.join(messages)
 
-    if backup:
-        res_args['backup_file'] = backup_file
+    if pam_limits.changed and not module.check_mode:
+        # Backup
+        if backup and os.path.exists(limits_conf):
+            res_args['backup_file'] = module.backup_local(limits_conf)
+        pam_limits.write(module)
 
     module.exit_json(**res_args)
 